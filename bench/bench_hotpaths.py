@@ -0,0 +1,305 @@
+# ================= 热点路径基准 =================
+# 用合成的大词库 / 大打印记录测量每次请求都会走到的路径：
+#   词库加载（xlsx 导入、SQLite 读取、缓存命中）、Step 2 的查词 + 拼写纠正循环、
+#   find_similar_words（difflib 对比纠错索引）、新词入库、打印记录追加/查询、卡片 HTML 渲染、
+#   复习队列聚合、上传单词表切词去重、AI 生成流水线（mock 客户端，不联网）
+# 每项报告 p50/p90/p95/p99 延迟与峰值内存，结果写成 JSON，可与上一次结果对比。
+#
+# 运行：python bench/bench_hotpaths.py [--sizes 5000,50000,500000] [--history 10000,100000,1000000]
+#                                      [--out bench_results.json] [--compare 上次的.json]
+import argparse
+import difflib
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import string
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from wordcard import ai_pipeline, card_render, config, history_store, review, word_bank, word_list, word_store  # noqa: E402
+from wordcard.spelling import SpellCorrector  # noqa: E402
+
+CUTOFF = 0.8
+
+
+# ----------------- 合成数据 -----------------
+def make_words(n, rng):
+    words = set()
+    while len(words) < n:
+        words.add("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 12))))
+    return sorted(words, key=lambda _: rng.random())
+
+
+def make_bank(n, rng):
+    words = make_words(n, rng)
+    return pd.DataFrame({
+        "Word": words,
+        "Phonetic": [f"/{w}/" for w in words],
+        "Meaning": ["n. 合成释义"] * n,
+        # 真实词库里有不少空单元格：每 50 个词留空一个例句/搭配
+        "Example": [None if i % 50 == 7 else f"The {w} is on the table. 这是一个例句。" for i, w in enumerate(words)],
+        "Collocation": [None if i % 50 == 9 else f"a big {w}" for i, w in enumerate(words)],
+    })
+
+
+def make_history(path, n, words, rng):
+    students = [f"学生{i}" for i in range(200)]
+    rows = [{"Student": rng.choice(students), "Class": f"YS{rng.randint(1, 20)}", "List_Num": f"List{rng.randint(1, 30)}",
+             "Word": rng.choice(words), "Print_Date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"}
+            for _ in range(n)]
+    pd.DataFrame(rows, columns=history_store.COLUMNS).to_csv(path, index=False)
+
+
+def make_typo(word, rng):
+    i = rng.randrange(len(word))
+    return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+
+
+class MockAIClient:
+    """与 OpenAI 客户端接口一致的假客户端：chat.completions.create(...)"""
+
+    def __init__(self, latency=0.05):
+        self.latency = latency
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        user = next(m["content"] for m in kwargs["messages"] if m["role"] == "user")
+        words = json.loads(user[len("Words: "):])
+        content = json.dumps({"words": [{"Word": w, "Phonetic": f"/{w}/", "Meaning": "n. 测试",
+                                         "Example": f"A {w}. 例句。", "Collocation": f"a {w}"} for w in words]})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+# ----------------- 测量 -----------------
+def measure(fn, repeat, setup=None):
+    """先计时 repeat 次，再在 tracemalloc 下单独跑一次取峰值内存"""
+    times = []
+    for _ in range(repeat):
+        if setup: setup()
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    if setup: setup()
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    times.sort()
+
+    def pct(p):
+        return times[min(len(times) - 1, int(round(p / 100 * (len(times) - 1))))]
+
+    return {"repeat": repeat, "mean_ms": statistics.fmean(times) * 1000,
+            "p50_ms": pct(50) * 1000, "p90_ms": pct(90) * 1000, "p95_ms": pct(95) * 1000, "p99_ms": pct(99) * 1000,
+            "min_ms": times[0] * 1000, "max_ms": times[-1] * 1000, "peak_kb": peak / 1024}
+
+
+class Runner:
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = []
+
+    def case(self, name, size, fn, repeat=None, setup=None):
+        stats = measure(fn, repeat or self.repeat, setup)
+        stats.update(case=name, size=size)
+        self.results.append(stats)
+        print(f"{name:<28} n={size:<8} p50={stats['p50_ms']:9.3f} ms  p95={stats['p95_ms']:9.3f} ms  "
+              f"peak={stats['peak_kb']:10.1f} KB", flush=True)
+
+
+# ----------------- 各项基准 -----------------
+def bench_bank(runner, n, tmp, rng, xlsx_max):
+    bank = make_bank(n, rng)
+    xlsx, store = os.path.join(tmp, f"bank_{n}.xlsx"), os.path.join(tmp, f"bank_{n}.sqlite")
+    if n <= xlsx_max:
+        bank.to_excel(xlsx, index=False)
+        runner.case("load.xlsx_import", n, lambda: word_store.migrate_from_excel(xlsx, store), repeat=3)
+    else:
+        word_store.write_frame(store, bank)
+    runner.case("load.sqlite_read", n, lambda: word_store.read_frame(store), repeat=5)
+
+    word_bank.invalidate_word_bank()
+    word_bank.load_word_bank(xlsx, store)
+    runner.case("load.cache_hit", n, lambda: word_bank.load_word_bank(xlsx, store))
+
+    df = word_bank.load_word_bank(xlsx, store)
+    runner.case("index.build", n, lambda: word_bank.WordIndex(df), repeat=3)
+    runner.case("index.derive_fields", n, lambda: card_render.derive_fields(df), repeat=3)
+    index = word_bank.load_word_index(xlsx, store)
+    # 整库计算的派生字段（含空例句/搭配）须与逐条计算的一致
+    for rec in index.lookup(bank["Word"].head(50).tolist())[0]:
+        plain = {k: v for k, v in rec.items() if k not in card_render.DERIVED}
+        assert card_render.derive_record(plain) == rec, rec["Word"]
+    runner.case("speller.build", n, lambda: SpellCorrector(index.words), repeat=3)
+    index.speller
+
+    words = bank["Word"].tolist()
+    # Step 2：200 个输入，其中 10% 拼错、5% 词库里没有
+    inputs = [rng.choice(words) for _ in range(170)] + [make_typo(rng.choice(words), rng) for _ in range(20)]
+    inputs += ["".join(rng.choice("xyz") for _ in range(9)) for _ in range(10)]
+
+    def step2():
+        found, not_found = index.lookup(inputs)
+        for w in not_found:
+            index.speller.get_close_matches(w, n=3, cutoff=CUTOFF)
+
+    runner.case("step2.lookup_spellcheck", n, step2)
+
+    typos = [make_typo(rng.choice(words), rng) for _ in range(20)]
+    word_list = [w.lower() for w in words]
+    runner.case("similar.speller", n, lambda: [index.speller.get_close_matches(t, 3, CUTOFF) for t in typos])
+    runner.case("similar.difflib", n, lambda: [difflib.get_close_matches(t, word_list, 3, CUTOFF) for t in typos],
+                repeat=max(1, min(runner.repeat, 5000000 // n)))
+
+    new_words = [{"Word": f"newword{i}", "Meaning": "n. 新词"} for i in range(20)]
+    runner.case("save.append_words", n, lambda: word_store.append_words(store, new_words))
+    runner.case("save.write_behind", n, lambda: word_bank.add_words(xlsx, store, new_words))
+    word_bank.flush_words(store)
+
+    # 与页面一致：记录取自索引（已带派生字段）
+    records = index.lookup(bank["Word"].head(100).tolist())[0]
+    info = {"name": "张三", "class_name": "YS1", "list_num": "List1"}
+    cold = card_render.FragmentCache()
+    runner.case("render.cold", 100, lambda: card_render.render_document(records, info, True, cache=cold),
+                setup=lambda: cold._items.clear())
+    runner.case("render.warm", 100, lambda: card_render.render_document(records, info, True))
+    return words
+
+
+def bench_history(runner, n, tmp, rng, words):
+    log = os.path.join(tmp, f"history_{n}.csv")
+    make_history(log, n, words, rng)
+    rows = [{"Student": "张三", "Class": "YS1", "List_Num": "List1", "Word": w, "Print_Date": "2026-01-01"}
+            for w in words[:100]]
+    runner.case("history.append", n, lambda: history_store.append_history(log, rows))
+    runner.case("history.compact_full", n, lambda: history_store.compact(log),
+                setup=lambda: os.path.exists(history_store.index_path(log)) and os.remove(history_store.index_path(log)),
+                repeat=3)
+    runner.case("history.query_student", n, lambda: history_store.query_history(log, student="学生7", class_name="YS3"))
+    runner.case("history.read_csv_full", n, lambda: pd.read_csv(log), repeat=3)
+    history = pd.read_csv(log, dtype=str, keep_default_na=False)
+    runner.case("review.aggregate", n, lambda: review.aggregate(history), repeat=3)
+    review.review_queue(log)
+    runner.case("review.queue_student", n, lambda: review.due_words(log, "YS3", "学生7"))
+    runner.case("review.queue_class", n, lambda: review.review_queue(log, "YS3"))
+    # 追加打印记录后的第一次查询：只并入新增的行
+    days = iter(pd.date_range("2027-01-01", periods=10000).strftime("%Y-%m-%d"))
+    runner.case("review.append_then_queue", n, lambda: review.due_words(log, "YS3", "学生7"),
+                setup=lambda: history_store.append_history(log, [dict(r, Print_Date=next(days)) for r in rows]))
+
+
+def bench_upload(runner, tmp, rng, words):
+    # 约 10MB 的单词表，不同单词只有几百个；另有一份只用逗号分隔、没有换行的
+    vocab = words[:500]
+    for name, sep, end in (("upload.txt", " ", "\n"), ("upload_comma.txt", ",", ",")):
+        path = os.path.join(tmp, name)
+        with open(path, "w", encoding="utf-8") as f:
+            for _ in range(120000):
+                f.write(sep.join(rng.choice(vocab) for _ in range(10)) + end)
+
+        def tokenize(path=path, name=name):
+            with open(path, "rb") as f:
+                word_list.words_from_file(f, name)
+
+        case = "upload.tokenize_txt" if sep == " " else "upload.tokenize_comma"
+        runner.case(case, os.path.getsize(path), tokenize, repeat=3)
+
+
+def bench_ai(runner):
+    words = [f"mockword{i}" for i in range(80)]
+    client = MockAIClient(latency=0.05)
+    runner.case("ai.generate_80_words", 80,
+                lambda: ai_pipeline.generate_words(words, client=client, chunk_size=8, max_workers=4), repeat=3)
+
+
+def bench_startup(runner, tmp):
+    # 冷启动：新进程导入核心引擎并加载词库（此时不应导入 openai）
+    # 词库文件先复制到临时目录，子进程里改掉 config 的路径，不碰真实数据
+    work = os.path.join(tmp, "startup")
+    os.makedirs(work, exist_ok=True)
+    paths = []
+    for src in (config.DATA_FILE, config.STORE_FILE):
+        dst = os.path.join(work, os.path.basename(src))
+        if os.path.exists(src):
+            shutil.copy2(src, dst)
+        paths.append(dst)
+    code = ("import sys, wordcard.config as cfg; cfg.DATA_FILE, cfg.STORE_FILE = sys.argv[1:3]; "
+            "import wordcard.core as c; c.load_or_create_data(); assert 'openai' not in sys.modules")
+    runner.case("startup.import_core", 0,
+                lambda: subprocess.run([sys.executable, "-c", code, *paths], cwd=ROOT, check=True), repeat=3)
+
+
+def compare(current, previous_path, threshold):
+    with open(previous_path, encoding="utf-8") as f:
+        previous = {(r["case"], r["size"]): r for r in json.load(f)["results"]}
+    print(f"\n与 {previous_path} 对比（p50，变慢超过 {threshold:.0%} 标记 !）")
+    regressions = 0
+    for r in current:
+        old = previous.get((r["case"], r["size"]))
+        if not old or not old["p50_ms"]:
+            continue
+        ratio = r["p50_ms"] / old["p50_ms"]
+        flag = "!" if ratio > 1 + threshold else " "
+        regressions += flag == "!"
+        print(f"{flag} {r['case']:<28} n={r['size']:<8} {old['p50_ms']:9.3f} -> {r['p50_ms']:9.3f} ms  x{ratio:.2f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="5000,50000,500000")
+    parser.add_argument("--history", default="10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--xlsx-max", type=int, default=50000, help="超过此规模不生成 xlsx（openpyxl 写入太慢）")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--compare", help="上一次的结果 JSON")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    runner = Runner(args.repeat)
+    tmp = tempfile.mkdtemp(prefix="wordcard_bench_")
+    try:
+        words = []
+        for n in [int(x) for x in args.sizes.split(",") if x]:
+            words = bench_bank(runner, n, tmp, rng, args.xlsx_max)
+        words = words or make_words(5000, rng)
+        for n in [int(x) for x in args.history.split(",") if x]:
+            bench_history(runner, n, tmp, rng, words)
+        bench_upload(runner, tmp, rng, words)
+        bench_ai(runner)
+        bench_startup(runner, tmp)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    out = {"meta": {"time": time.strftime("%Y-%m-%d %H:%M:%S"), "python": platform.python_version(),
+                    "pandas": pd.__version__, "platform": platform.platform(), "args": vars(args)},
+           "results": runner.results}
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(out, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已写入 {args.out}")
+    if args.compare and compare(runner.results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# ================= 拼写纠正基准 =================
+# 用真实的 Total_Words.xlsx 词表，比较 difflib.get_close_matches 与 SpellCorrector：
+#   - 两者在 cutoff=0.8 / n=3 下的结果必须逐字一致
+#   - 报告每次查询的平均耗时与加速比
+# 运行：python bench/bench_spelling.py [查询数量]
+import difflib
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from wordcard.spelling import SpellCorrector  # noqa: E402
+
+CUTOFF = 0.8
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def make_typo(word, rng):
+    """随机做一次 删除/插入/替换/相邻交换，模拟学生拼错"""
+    if len(word) < 2:
+        return word + rng.choice(LETTERS)
+    i = rng.randrange(len(word))
+    op = rng.choice("disx")
+    if op == "d":
+        return word[:i] + word[i + 1:]
+    if op == "i":
+        return word[:i] + rng.choice(LETTERS) + word[i:]
+    if op == "s":
+        return word[:i] + rng.choice(LETTERS) + word[i + 1:]
+    i = min(i, len(word) - 2)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def main():
+    queries_n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    df = pd.read_excel(os.path.join(ROOT, "Total_Words.xlsx")).astype(str)
+    word_list = df["Word"].str.lower().tolist()
+
+    rng = random.Random(42)
+    queries = [make_typo(rng.choice(word_list), rng) for _ in range(queries_n)]
+    queries += ["".join(rng.choice(LETTERS) for _ in range(rng.randint(3, 12))) for _ in range(queries_n // 10)]
+
+    start = time.perf_counter()
+    speller = SpellCorrector(word_list)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = [difflib.get_close_matches(q, word_list, n=3, cutoff=CUTOFF) for q in queries]
+    t_difflib = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = [speller.get_close_matches(q, n=3, cutoff=CUTOFF) for q in queries]
+    t_index = time.perf_counter() - start
+
+    mismatches = [(q, e, a) for q, e, a in zip(queries, expected, actual) if e != a]
+    n = len(queries)
+    print(f"词库 {len(word_list)} 词，查询 {n} 次（cutoff={CUTOFF}）")
+    print(f"索引构建:      {build * 1000:8.2f} ms")
+    print(f"difflib:       {t_difflib / n * 1000:8.3f} ms/次")
+    print(f"SpellCorrector:{t_index / n * 1000:8.3f} ms/次  (x{t_difflib / t_index:.1f})")
+    if mismatches:
+        for q, e, a in mismatches[:10]:
+            print(f"  不一致: {q!r} difflib={e} index={a}")
+        sys.exit(f"{len(mismatches)} 个查询结果不一致")
+    print("结果与 difflib 完全一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# ================= 本地 mock AI 服务 =================
+# 兼容 OpenAI 的 /chat/completions 接口，按请求中的单词返回假词条，
+# 用于在不消耗 DeepSeek 额度的情况下测试 ai_pipeline 的分批、并发与重试。
+# 运行：python bench/mock_openai_server.py [--port 8765] [--latency 0.2] [--fail-rate 0.2]
+# 然后把 base_url 指向 http://127.0.0.1:8765
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def fake_entry(word):
+    return {"Word": word, "Phonetic": f"/{word}/", "Meaning": "n. 测试释义",
+            "Example": f"This is a {word}. 这是一个测试。", "Collocation": f"a {word}"}
+
+
+def make_handler(latency=0.0, fail_rate=0.0, malformed_rate=0.0):
+    stats = {"requests": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, code, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            with lock:
+                stats["requests"] += 1
+            req = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            time.sleep(latency)
+            if random.random() < fail_rate:
+                return self._send(500, {"error": {"message": "mock failure"}})
+            user = next(m["content"] for m in req["messages"] if m["role"] == "user")
+            words = json.loads(re.sub(r"^Words:\s*", "", user))
+            content = json.dumps({"words": [fake_entry(w) for w in words]}, ensure_ascii=False)
+            if random.random() < malformed_rate:
+                content = content[: len(content) // 2]
+            self._send(200, {
+                "id": "mock", "object": "chat.completion", "created": int(time.time()),
+                "model": req.get("model", "mock"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+            })
+
+    Handler.stats = stats
+    return Handler
+
+
+def start_server(port=0, **kwargs):
+    """在后台线程启动，返回 (server, base_url)；port=0 时自动选端口"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(**kwargs))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port),
+                                 make_handler(args.latency, args.fail_rate, args.malformed_rate))
+    print(f"mock AI 服务: http://127.0.0.1:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,44 @@
+import io
+import threading
+import zipfile
+
+from wordcard import batch, card_render
+
+
+def _fake_resolve(monkeypatch):
+    def resolve(words, index, api_key, base_url, on_progress=None):
+        found = {w: {"Word": w, "Meaning": "n. 测试", "Example": f"A {w}.", "Collocation": w, "Phonetic": ""}
+                 for w in words if w.startswith("w")}
+        return found, {}, [w for w in words if w not in found]
+
+    monkeypatch.setattr(batch, "load_index", lambda: None)
+    monkeypatch.setattr(batch, "resolve_words", resolve)
+
+
+def test_students_without_cards_are_skipped(monkeypatch):
+    _fake_resolve(monkeypatch)
+    jobs = batch.parse_roster("C1,甲,L1,w1 w2\nC1,乙,L1,missing\nC1,丙,L1,w3")
+    name, payload, report = batch.run_batch(jobs, workers=1, record_history=False)
+    assert zipfile.ZipFile(io.BytesIO(payload)).namelist() == [
+        batch.file_name(jobs[0]), batch.file_name(jobs[2])]
+    assert report["empty"] == ["乙"] and report["cards"] == 3 and report["failed"] == ["missing"]
+
+
+def test_pool_does_not_inherit_held_fragment_lock(monkeypatch):
+    # 其他会话正在渲染（片段缓存的锁被占着）时启动进程池，子进程不能卡在这把锁上
+    _fake_resolve(monkeypatch)
+    jobs = batch.parse_roster("\n".join(f"C1,s{i},L1,w{i} w{i + 1}" for i in range(6)))
+    held, release = threading.Event(), threading.Event()
+
+    def hold():
+        with card_render.fragments._lock:
+            held.set()
+            release.wait(60)
+
+    threading.Thread(target=hold, daemon=True).start()
+    held.wait()
+    try:
+        name, payload, report = batch.run_batch(jobs, workers=2, record_history=False)
+    finally:
+        release.set()
+    assert len(zipfile.ZipFile(io.BytesIO(payload)).namelist()) == 6
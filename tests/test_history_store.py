@@ -0,0 +1,27 @@
+from wordcard import history_store
+
+
+def _rows(words, day="2026-01-01"):
+    return [{"Student": "s", "Class": "c", "List_Num": "1", "Word": w, "Print_Date": day} for w in words]
+
+
+def test_compact_is_incremental(tmp_path):
+    log = str(tmp_path / "history.csv")
+    history_store.append_history(log, _rows(["apple", "pear"]))
+    assert history_store.compact(log) == 2
+    assert history_store.compact(log) == 0
+    history_store.append_history(log, _rows(["fig"], "2026-01-02"))
+    assert history_store.compact(log) == 1
+    assert history_store.query_history(log)["Word"].tolist() == ["apple", "pear", "fig"]
+
+
+def test_compact_rebuilds_after_rewrite(tmp_path):
+    log = str(tmp_path / "history.csv")
+    history_store.append_history(log, _rows(["apple", "pear"]))
+    assert history_store.query_history(log)["Word"].tolist() == ["apple", "pear"]
+    for old, new in (("apple", "apples"), ("apples", "banana")):  # 变长、大小不变
+        with open(log, encoding="utf-8") as f:
+            text = f.read()
+        with open(log, "w", encoding="utf-8") as f:
+            f.write(text.replace(old, new))
+        assert history_store.query_history(log)["Word"].tolist() == [new, "pear"]
@@ -0,0 +1,17 @@
+import json
+
+from wordcard import metrics
+
+
+def test_registered_stats_are_exported(tmp_path):
+    registry = metrics.Registry()
+    registry.register("ai_cache", lambda: {"hits": 3, "hit_rate": 0.75, "writer": {"/x": {"pending": 1}}})
+    registry.register("broken", lambda: 1 / 0)
+    path = tmp_path / "metrics.json"
+    registry.write_json(str(path))
+    stats = json.loads(path.read_text(encoding="utf-8"))["stats"]
+    assert stats["ai_cache"]["hit_rate"] == 0.75
+    assert "ZeroDivisionError" in stats["broken"]["error"]
+    text = registry.prometheus_text()
+    assert "wordcard_ai_cache_hits 3" in text and "wordcard_ai_cache_hit_rate 0.75" in text
+    assert "writer" not in text
@@ -0,0 +1,75 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from wordcard import history_store, review
+from wordcard.history_store import COLUMNS
+
+
+def _history(rng, n, students, words, dates):
+    return pd.DataFrame([{
+        "Student": rng.choice(students), "Class": rng.choice(["C1", "C2", "C10"]), "List_Num": "L1",
+        "Word": rng.choice(words), "Print_Date": rng.choice(dates),
+    } for _ in range(n)], columns=COLUMNS)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_fold_matches_full_aggregate(seed):
+    rng = random.Random(seed)
+    students = [f"s{i}" for i in range(rng.randint(2, 40))]
+    words = [f"w{i}" for i in range(rng.randint(5, 80))] + ["Apple ", ""]
+    dates = [f"2026-01-{d:02d}" for d in range(1, 20)] + ["bad"]
+    # 后几批只出现在新学生身上，覆盖“同一插入点上既有老学生的新词又有新学生”的情况
+    batches = [_history(rng, rng.randint(0, 300), students[:len(students) // 2], words, dates)]
+    batches += [_history(rng, rng.randint(0, 300), students, words, dates) for _ in range(5)]
+
+    agg = review.aggregate(batches[0])
+    seen = review.seen_pairs(batches[0])
+    for i in range(1, len(batches)):
+        agg, seen = review.fold(agg, seen, batches[i])
+        full = pd.concat(batches[:i + 1], ignore_index=True)
+        pd.testing.assert_frame_equal(agg, review.aggregate(full))
+        assert agg.index.is_monotonic_increasing
+        np.testing.assert_array_equal(seen, review.seen_pairs(full))
+
+
+def test_new_student_and_new_word_in_one_batch():
+    def row(student, word, day):
+        return {"Student": student, "Class": "C1", "List_Num": "L1", "Word": word, "Print_Date": day}
+
+    a = pd.DataFrame([row("s0", "date", "2026-01-01")], columns=COLUMNS)
+    b = pd.DataFrame([row("s1", "fig", "2026-01-02"), row("s0", "egg", "2026-01-02")], columns=COLUMNS)
+    c = pd.DataFrame([row("s0", "date", "2026-01-03")], columns=COLUMNS)
+    agg, seen = review.aggregate(a), review.seen_pairs(a)
+    for batch in (b, c):
+        agg, seen = review.fold(agg, seen, batch)
+    pd.testing.assert_frame_equal(agg, review.aggregate(pd.concat([a, b, c], ignore_index=True)))
+    assert review.due(agg.loc[[("C1", "s0")]], "2026-01-10")["Word"].tolist() == ["date", "egg"]
+
+
+def test_cache_follows_appends(tmp_path):
+    log = str(tmp_path / "history.csv")
+    cache = review.ReviewCache()
+    rng = random.Random(1)
+    words = [f"w{i}" for i in range(30)]
+    for _ in range(10):
+        history_store.append_history(log, _history(rng, 50, ["s0", "s1", "s2"], words, ["2026-02-01", "2026-02-02"]))
+        full = pd.read_csv(log, dtype=str, keep_default_na=False)
+        pd.testing.assert_frame_equal(cache.get(log), review.aggregate(full))
+
+
+@pytest.mark.parametrize("old, new", [("apple", "apples"), ("apple", "grape")])
+def test_cache_rebuilds_after_rewrite(tmp_path, old, new):
+    # 手动改写日志（变长或大小不变）后不能再沿用旧的聚合
+    log = str(tmp_path / "history.csv")
+    history_store.append_history(log, [{"Student": "s", "Class": "c", "List_Num": "1", "Word": w,
+                                        "Print_Date": "2026-01-01"} for w in (old, "pear")])
+    cache = review.ReviewCache()
+    assert cache.get(log)["Word"].tolist() == [old, "pear"]
+    with open(log, encoding="utf-8") as f:
+        text = f.read()
+    with open(log, "w", encoding="utf-8") as f:
+        f.write(text.replace(old, new))
+    assert cache.get(log)["Word"].tolist() == [new, "pear"]
@@ -0,0 +1,23 @@
+import pandas as pd
+
+from wordcard import word_bank, word_store, word_writer
+
+
+def test_load_keeps_words_written_during_the_load(tmp_path, monkeypatch):
+    # 写线程恰好在“读库”与“取 pending”之间写完一批：这批词条不能从内存词库里消失
+    xlsx, store = str(tmp_path / "bank.xlsx"), str(tmp_path / "bank.sqlite")
+    word_store.write_frame(store, pd.DataFrame({"Word": ["apple"], "Meaning": ["n. 苹果"]}))
+    batch = [{"Word": "zephyr", "Meaning": "n. 西风"}]
+    state = {"pending": batch}
+    read_frame = word_store.read_frame
+
+    def read_then_flush(path):
+        df = read_frame(path)
+        word_store.append_words(path, state["pending"])
+        state["pending"] = []
+        return df
+
+    monkeypatch.setattr(word_store, "read_frame", read_then_flush)
+    monkeypatch.setattr(word_writer, "pending", lambda path: list(state["pending"]))
+    df = word_bank._load(xlsx, store)
+    assert df["Word"].tolist() == ["apple", "zephyr"]
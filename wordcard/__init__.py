@@ -0,0 +1,31 @@
+"""
+雅睿途智能单词卡核心引擎：词库、查词与纠错、AI 补全、打印记录、卡片渲染。
+不依赖 Streamlit；各子模块按需导入（OpenAI 客户端只在真正有生词时才加载）。
+
+    from wordcard import core
+    index = core.load_index()
+"""
+import importlib
+
+_EXPORTS = {
+    "load_or_create_data": "core",
+    "save_new_words_to_excel": "core",
+    "load_history": "core",
+    "save_history": "core",
+    "review_words": "core",
+    "load_index": "core",
+    "print_records": "core",
+    "find_similar_words": "core",
+    "resolve_words": "core",
+    "generate_words_by_ai": "core",
+    "generate_clean_html": "core",
+    "generate_preview_page": "core",
+    "preview_page_count": "core",
+}
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f".{module}", __name__), name)
@@ -0,0 +1,155 @@
+# ================= AI 生成结果缓存 =================
+# 以 (规范化单词 + 模型 + 提示词版本) 的哈希为键，持久保存 AI 生成的词条：
+#   - 同一个单词只付费生成一次，之后所有会话拿到的结果完全相同
+#   - 进程内 single-flight：两个会话几乎同时请求同一个生词时，
+#     后来者等待正在进行的那次请求，而不是再发一次
+#   - 超过容量时按最近使用时间淘汰
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+MAX_ENTRIES = 50000
+
+
+def normalize(word):
+    return " ".join(str(word).split()).lower()
+
+
+def prompt_version(model, system_prompt):
+    digest = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:12]
+    return f"{model}:{digest}"
+
+
+class GenerationCache:
+    def __init__(self, path, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0      # 等待了其他会话正在进行的请求
+        self.evictions = 0
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS gen_cache ("
+                "key TEXT PRIMARY KEY, word TEXT, record TEXT, created REAL, last_used REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS gen_cache_lru ON gen_cache (last_used)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def key(word, version):
+        return hashlib.sha256(f"{version}\x00{normalize(word)}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        """返回 {key: record}，命中的条目刷新最近使用时间"""
+        keys = list(dict.fromkeys(keys))
+        if not keys: return {}
+        found = {}
+        conn = self._connect()
+        try:
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                marks = ", ".join("?" * len(part))
+                for k, rec in conn.execute(f"SELECT key, record FROM gen_cache WHERE key IN ({marks})", part):
+                    found[k] = json.loads(rec)
+            if found:
+                now = time.time()
+                conn.executemany("UPDATE gen_cache SET last_used=? WHERE key=?", [(now, k) for k in found])
+                conn.commit()
+        finally:
+            conn.close()
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        """items: {key: record}"""
+        if not items: return
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO gen_cache (key, word, record, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                    [(k, normalize(r.get("Word", "")), json.dumps(r, ensure_ascii=False), now, now)
+                     for k, r in items.items()],
+                )
+                (count,) = conn.execute("SELECT COUNT(*) FROM gen_cache").fetchone()
+                over = count - self.max_entries
+                if over > 0:
+                    conn.execute(
+                        "DELETE FROM gen_cache WHERE key IN "
+                        "(SELECT key FROM gen_cache ORDER BY last_used LIMIT ?)", (over,))
+        finally:
+            conn.close()
+        if over > 0:
+            with self._lock:
+                self.evictions += over
+
+    def claim(self, keys):
+        """
+        single-flight 登记
+        :return: (owned, waiting)；owned 为本调用负责生成的 key 列表，
+                 waiting 为 {key: Future}，由其他正在进行的请求负责
+        """
+        owned, waiting = [], {}
+        with self._lock:
+            for k in dict.fromkeys(keys):
+                fut = self._inflight.get(k)
+                if fut is None:
+                    self._inflight[k] = Future()
+                    owned.append(k)
+                else:
+                    waiting[k] = fut
+            self.shared += len(waiting)
+        return owned, waiting
+
+    def resolve(self, key, record):
+        """生成结束（record 为 None 表示失败），唤醒等待者"""
+        with self._lock:
+            fut = self._inflight.pop(key, None)
+        if fut is not None:
+            fut.set_result(record)
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            (entries,) = conn.execute("SELECT COUNT(*) FROM gen_cache").fetchone()
+        finally:
+            conn.close()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "shared_inflight": self.shared,
+                "evictions": self.evictions,
+                "inflight": len(self._inflight),
+            }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(path, max_entries=MAX_ENTRIES):
+    """同一路径在进程内只有一个实例，single-flight 才能跨会话生效"""
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = _caches[path] = GenerationCache(path, max_entries)
+        return cache
@@ -0,0 +1,188 @@
+# ================= AI 生成流水线 =================
+# 缺失单词按固定大小分批，线程池并发请求（并发数可配置），
+# 每批失败或 JSON 不合法时带退避重试，只重试该批中还没拿到结果的单词。
+# 进度回调在调用线程（Streamlit 脚本线程）中执行，可以直接更新 st.status。
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from . import ai_cache
+
+MODEL = "deepseek-chat"
+SYSTEM_PROMPT = """
+    You are an English teacher. Output ONLY valid JSON.
+    JSON format: [{"Word": "...", "Phonetic": "...", "Meaning": "...", "Example": "...", "Collocation": "..."}]
+    Rules:
+    1. "Meaning": MUST be in CHINESE only (n./v. + 中文意思)
+    2. "Collocation": MUST be in ENGLISH only. No Chinese translation or explanation.
+    3. "Example": English sentence + Chinese translation.
+    4. "Phonetic": Use standard IPA phonetic symbols.
+    5. The card's English components (Word, Phonetic, Collocation, and English part of Example) must NOT contain any Chinese characters.
+    """
+
+CHUNK_SIZE = 8
+MAX_WORKERS = 4
+RETRIES = 2
+BACKOFF_SECONDS = 1.0
+
+
+def parse_response(content):
+    """解析模型输出，兼容 {"words": [...]} 等包了一层的格式"""
+    data = json.loads(content)
+    if isinstance(data, dict):
+        for k in ["words", "list", "data"]:
+            if k in data and isinstance(data[k], list):
+                data = data[k]
+                break
+        else:
+            # 只返回一个单词时模型有时直接给出对象本身
+            data = [data] if "Word" in data else []
+    if not isinstance(data, list):
+        raise ValueError("AI 返回的不是单词列表")
+    return [r for r in data if isinstance(r, dict) and r.get("Word")]
+
+
+def request_words(client, words, model=MODEL):
+    response = client.chat.completions.create(
+        model=model,
+        messages=[{"role": "system", "content": SYSTEM_PROMPT},
+                  {"role": "user", "content": f"Words: {json.dumps(words)}"}],
+        response_format={'type': 'json_object'},
+        temperature=0.1
+    )
+    return parse_response(response.choices[0].message.content)
+
+
+def _run_chunk(client, words, retries, backoff, model):
+    """返回 (records, 失败的单词, 最后一次错误)"""
+    pending = list(words)
+    records, error = [], None
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(backoff * (2 ** (attempt - 1)) * (1 + random.random() * 0.25))
+        try:
+            got = request_words(client, pending, model)
+        except Exception as e:
+            error = e
+            continue
+        wanted = {ai_cache.normalize(w) for w in pending}
+        records.extend(got)
+        done = {ai_cache.normalize(r["Word"]) for r in got}
+        pending = [w for w in pending if ai_cache.normalize(w) not in done]
+        if not pending:
+            return records, [], None
+        if not wanted & done:
+            error = ValueError("AI 返回结果中没有请求的单词")
+    return records, pending, error
+
+
+def chunked(words, size):
+    return [words[i:i + size] for i in range(0, len(words), size)]
+
+
+def _generate(client, words, chunk_size, max_workers, retries, backoff, model, on_chunk):
+    """分批并发，每批完成时在调用线程里执行 on_chunk(index, chunk_words, records, failed, error)"""
+    chunks = chunked(list(words), max(1, chunk_size))
+    if not chunks: return chunks
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as pool:
+        futures = {pool.submit(_run_chunk, client, c, retries, backoff, model): i for i, c in enumerate(chunks)}
+        for fut in as_completed(futures):
+            i = futures[fut]
+            on_chunk(i, chunks[i], *fut.result())
+    return chunks
+
+
+def generate_words(words, api_key=None, base_url=None, client=None, chunk_size=CHUNK_SIZE,
+                   max_workers=MAX_WORKERS, retries=RETRIES, backoff=BACKOFF_SECONDS,
+                   on_progress=None, model=MODEL, cache=None, wait_timeout=300):
+    """
+    并发生成缺失单词
+    :param client: 可传入现成的 OpenAI 兼容客户端（测试/基准时用 mock）
+    :param on_progress: on_progress(done, total, chunk_words, records, failed_words, error)，每批完成调用一次
+    :param cache: ai_cache.GenerationCache；命中的单词不再请求，其他会话正在生成的单词等待其结果
+    :return: (records, failed_words)，records 按输入顺序合并且按单词去重
+    """
+    if not words: return [], []
+    words = list(dict.fromkeys(words))
+    keys = {}
+    cached, owned, waiting = {}, set(), {}
+    if cache is not None:
+        version = ai_cache.prompt_version(model, SYSTEM_PROMPT)
+        keys = {w: cache.key(w, version) for w in words}
+        # 先登记再查缓存：若在查缓存之后才登记，另一会话恰好在两步之间写入缓存并 resolve，
+        # 这里既查不到缓存也看不到进行中的请求，会重复请求一次
+        owned_keys, waiting = cache.claim(keys.values())
+        try:
+            cached = cache.get_many(owned_keys)
+        except BaseException:
+            for k in owned_keys:
+                cache.resolve(k, None)
+            raise
+        for k in cached:
+            cache.resolve(k, cached[k])
+        owned = set(owned_keys) - set(cached)
+        todo = [w for w in words if keys[w] in owned]
+    else:
+        todo = words
+
+    by_word = {}   # 规范化单词 -> record
+    extra = []     # AI 返回了但不对应任何请求单词的词条（如词形变化）
+    failed = set()
+    total = len(chunked(todo, max(1, chunk_size)))
+    done = 0
+
+    def on_chunk(i, chunk, records, chunk_failed, error):
+        nonlocal done
+        done += 1
+        wanted = {ai_cache.normalize(w): w for w in chunk}
+        fresh = {}
+        for r in records:
+            n = ai_cache.normalize(r["Word"])
+            if n in wanted:
+                by_word.setdefault(n, r)
+                if cache is not None:
+                    fresh[keys[wanted[n]]] = by_word[n]
+            elif n not in by_word:
+                by_word[n] = r
+                extra.append(n)
+        failed.update(chunk_failed)
+        if cache is not None:
+            cache.put_many(fresh)
+            for w in chunk:
+                cache.resolve(keys[w], fresh.get(keys[w]))
+        if on_progress:
+            on_progress(done, total, chunk, records, chunk_failed, error)
+
+    try:
+        if todo:
+            if client is None:
+                from openai import OpenAI  # 只有真的需要请求 AI 时才加载 SDK
+                # 重试由本模块统一控制，关闭 SDK 自带的重试避免叠加
+                client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0, timeout=60)
+            _generate(client, todo, chunk_size, max_workers, retries, backoff, model, on_chunk)
+    finally:
+        # 异常退出时也要唤醒等待者，避免其他会话一直挂起
+        if cache is not None:
+            for w in todo:
+                cache.resolve(keys[w], None)
+
+    for w in words:
+        k = keys.get(w)
+        if k in cached:
+            by_word.setdefault(ai_cache.normalize(w), cached[k])
+        elif k in waiting:
+            try:
+                rec = waiting[k].result(timeout=wait_timeout)
+            except Exception:
+                rec = None
+            if rec is None:
+                failed.add(w)
+            else:
+                by_word.setdefault(ai_cache.normalize(w), rec)
+
+    requested = list(dict.fromkeys(ai_cache.normalize(w) for w in words))
+    merged = [by_word[n] for n in requested if n in by_word]
+    requested_set = set(requested)
+    merged += [by_word[n] for n in extra if n not in requested_set]
+    return merged, [w for w in words if w in failed]
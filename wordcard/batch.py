@@ -0,0 +1,160 @@
+# ================= 整班批量生成 =================
+# 输入 CSV：每行 班级,姓名,List编号,单词...（单词可以分成多列，也可以在一个单元格里用逗号/空格分隔）
+# 流程：所有学生的单词去重后一次性查词库 -> 拼写纠正 -> 缺失的一次性交给 AI 补全并入库，
+#      再用进程池并行渲染每个学生的打印文件，打印记录一次性追加。
+# 命令行：python -m wordcard.batch roster.csv -o cards.zip [--combined] [--workers 4]
+import argparse
+import csv
+import io
+import multiprocessing
+import os
+import re
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from . import card_render, config, history_store
+from .core import load_index, resolve_words
+
+_HEADER_NAMES = {"class", "班级"}
+_SPLIT = re.compile(r'[,\s\n]+')
+
+
+def parse_roster(text):
+    """
+    解析名单 CSV
+    :return: [{"class_name", "name", "list_num", "words"}]，words 已转小写、按输入顺序去重
+    """
+    jobs = []
+    for row in csv.reader(io.StringIO(text.lstrip("\ufeff"))):
+        if len(row) < 3 or not any(c.strip() for c in row):
+            continue
+        if not jobs and row[0].strip().lower() in _HEADER_NAMES:
+            continue
+        words = []
+        for cell in row[3:]:
+            words.extend(w.strip().lower() for w in _SPLIT.split(cell) if w.strip())
+        jobs.append({"class_name": row[0].strip(), "name": row[1].strip(), "list_num": row[2].strip(),
+                     "words": list(dict.fromkeys(words))})
+    return jobs
+
+
+def file_name(job):
+    # 与页面上「下载打印文件」的文件名一致
+    return f"单词卡_{job['class_name']}_{job['name']}_{job['list_num']}.html"
+
+
+# 渲染进程里使用的卡片片段缓存（由 _init_worker 换成子进程自己的）
+_fragments = card_render.fragments
+
+
+def _init_worker():
+    global _fragments
+    _fragments = card_render.FragmentCache()
+
+
+def _render_one(args):
+    records, info = args
+    return card_render.render_document(records, info, True, cache=_fragments)
+
+
+def _render_pages(args):
+    records, info = args
+    return card_render.render_pages(records, info, True, cache=_fragments)
+
+
+def run_batch(jobs, api_key=None, base_url=config.DEFAULT_BASE_URL, combined=False, workers=None,
+              record_history=True, on_progress=None):
+    """
+    :return: (文件名, bytes, 报告)；combined=True 时为一个合并的 HTML，否则为 ZIP。
+             一张卡片都没有的学生不生成文件，姓名列在报告的 empty 中
+    """
+    all_words = list(dict.fromkeys(w for job in jobs for w in job["words"]))
+    resolved, corrections, failed = resolve_words(all_words, load_index(), api_key, base_url, on_progress)
+
+    tasks, empty = [], []
+    for job in jobs:
+        # 同一学生的列表中，纠正后与其他单词重复的只保留一次
+        records, seen = [], set()
+        for w in job["words"]:
+            rec = resolved.get(w)
+            if rec is not None and rec["Word"] not in seen:
+                seen.add(rec["Word"])
+                records.append(rec)
+        if not records:
+            empty.append(job["name"])  # 一张卡片都没有的学生不生成空文件
+            continue
+        info = {"name": job["name"], "class_name": job["class_name"], "list_num": job["list_num"]}
+        tasks.append((job, records, info))
+
+    render = _render_pages if combined else _render_one
+    args = [(records, info) for _, records, info in tasks]
+    if workers == 1 or len(tasks) < 2:
+        rendered = [render(a) for a in args]
+    else:
+        # 页面里有 tornado、写线程等其他线程，fork 出的子进程可能继承一把被占着的锁（如片段缓存的锁）而永远卡住；
+        # 用 spawn 启动全新的解释器，每个子进程有自己的片段缓存
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker) as pool:
+            rendered = list(pool.map(render, args, chunksize=4))
+
+    stamp = datetime.now().strftime("%Y-%m-%d")
+    if combined:
+        html = "".join([
+            card_render.DOC_HEAD.format(name=f"批量_{stamp}"), card_render.STYLE, card_render.DOC_BODY,
+            "".join(rendered), card_render.AUTO_PRINT, card_render.DOC_TAIL,
+        ])
+        name, payload = f"单词卡_批量_{stamp}.html", html.encode("utf-8")
+    else:
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+            for (job, _, _), html in zip(tasks, rendered):
+                zf.writestr(file_name(job), html)
+        name, payload = f"单词卡_批量_{stamp}.zip", buf.getvalue()
+
+    if record_history:
+        history_store.append_history(config.HISTORY_FILE, [
+            {"Student": info["name"], "Class": info["class_name"], "List_Num": info["list_num"],
+             "Word": r["Word"], "Print_Date": stamp}
+            for _, records, info in tasks for r in records
+        ])
+
+    report = {"students": len(jobs), "words": len(all_words), "cards": sum(len(r) for _, r, _ in tasks),
+              "corrections": corrections, "failed": failed, "empty": empty}
+    return name, payload, report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="整班批量生成单词卡")
+    parser.add_argument("roster", help="CSV：班级,姓名,List编号,单词...")
+    parser.add_argument("-o", "--output", help="输出文件（默认按日期命名，写到当前目录）")
+    parser.add_argument("--combined", action="store_true", help="输出一个合并的打印文件，而不是 ZIP")
+    parser.add_argument("--workers", type=int, default=None, help="渲染进程数（默认 CPU 核数）")
+    parser.add_argument("--no-history", action="store_true", help="不写入打印记录")
+    parser.add_argument("--api-key", default=os.environ.get("DEEPSEEK_API_KEY", ""))
+    parser.add_argument("--base-url", default=config.DEFAULT_BASE_URL)
+    args = parser.parse_args(argv)
+
+    with open(args.roster, encoding="utf-8-sig") as f:
+        jobs = parse_roster(f.read())
+    if not jobs:
+        sys.exit("名单为空")
+    name, payload, report = run_batch(
+        jobs, args.api_key, args.base_url, combined=args.combined, workers=args.workers,
+        record_history=not args.no_history,
+        on_progress=lambda done, total, *_: print(f"AI 生成 {done}/{total} 批", file=sys.stderr))
+    out = args.output or name
+    with open(out, "wb") as f:
+        f.write(payload)
+    print(f"{report['students']} 名学生，{report['cards']} 张卡片 -> {out}")
+    for original, corrected in report["corrections"].items():
+        print(f"  已纠正 '{original}' → '{corrected}'")
+    if report["failed"]:
+        print(f"  未找到/生成失败：{', '.join(report['failed'])}")
+    if report["empty"]:
+        print(f"  没有可打印的卡片，已跳过：{', '.join(report['empty'])}")
+
+
+if __name__ == "__main__":
+    main()
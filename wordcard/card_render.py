@@ -0,0 +1,279 @@
+# ================= 卡片渲染 =================
+# 页面/卡片模板在导入时只准备一次；每张卡片的 HTML 片段按词条内容缓存（进程内共享），
+# 预览与打印版本由同一批片段拼成，只在顶部提示、自动打印脚本和复习区上有差别。
+# 列表里改动一个单词，重新渲染时只有这一张卡片需要重新生成。
+# 挖空例句、纯英文例句/搭配按词库版本整体预先计算（derive_fields），渲染时只做模板替换。
+import random
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+CARDS_PER_PAGE = 5
+FRAGMENT_CACHE_SIZE = 20000
+
+STYLE = """
+    <style>
+        body {margin:0;padding:0;font-family:"Helvetica Neue",Arial,sans-serif;background:white;color:#333;}
+        .page {height:297mm;padding:11mm 13mm;box-sizing:border-box;page-break-after:always;display:flex;flex-direction:column;}
+        .page:last-child {page-break-after:auto;}
+        .header {text-align:center;font-size:13px;padding-bottom:6px;border-bottom:1px solid #eee;margin-bottom:12px;position:relative;}
+        .header .page-num {position:absolute;right:0;top:0;font-size:12px;color:#666;}
+        .cards {flex:1;display:flex;flex-direction:column;gap:8mm;} /* 干净间距，无多余线 */
+        .card {display:flex;height:40mm;border:1px dashed #999;position:relative;flex-shrink:0;}
+        .card::before {content:'';position:absolute;bottom:-7px;left:30%;right:30%;border-bottom:none;} /* 移除虚线 */
+        .card::after {content:'✂️';position:absolute;bottom:-13px;right:8px;font-size:19px;color:#999;}
+        .left, .right {flex:1;padding:7px 10px;display:flex;flex-direction:column;box-sizing:border-box;}
+        .right {background:#fcfcfc;border-left:1px solid #eee;}
+        .cn-tag {background:#333;color:white;padding:2px 6px;border-radius:4px;font-size:10.5px;align-self:flex-start;}
+        .meaning-line {display:flex;align-items:center;gap:6px;font-size:14.5px;margin-bottom:5px;}
+        .cloze {background:#f0f2f6;padding:6px 8px;border-radius:4px;font-style:italic;font-size:11.5px;line-height:1.4;
+                 border:1px solid #ebedf0;flex-grow:1;overflow:hidden;display:flex;align-items:center;}
+        .meta {font-size:9.5px;color:#666;margin-top:5px;padding-top:5px;border-top:1px dotted #ddd;}
+        .box {display:inline-block;width:10px;height:10px;border:1px solid #444;margin-right:3px;}
+        .sentence {font-size:12px;color:#666;line-height:1.4;flex-grow:1;overflow:hidden;}
+        .review {margin-top:15px;padding:12px;border-top:3px dashed #ccc;background:#fdfdfd;font-size:11.5px;height:45mm;box-sizing:border-box;} /* 增大上间距 */
+        @media print {
+            @page {margin:0;size:A4;}
+            body {background:white;-webkit-print-color-adjust:exact;}
+            .no-print {display:none !important;}
+        }
+    </style>"""
+
+DOC_HEAD = """
+    <!DOCTYPE html>
+    <html><head><meta charset="UTF-8"><title>单词卡_{name}</title>"""
+
+DOC_BODY = """</head><body>
+    """
+
+DOC_TAIL = """
+    </body></html>
+    """
+
+AUTO_PRINT = """<script>window.onload=function(){setTimeout(()=>{window.print();},800)}</script>"""
+HEADER_TIP = '<div class="no-print" style="text-align:center;padding:10px;background:#e6fffa;color:#2c7a7b;font-size:13px;border-bottom:1px solid #b2f5ea;">打印提示：A4纸 + 勾选"背景图形"</div>'
+
+PAGE_HEADER = '''
+        <div class="header">
+            班级: <strong>{class_name}</strong> | 姓名: <strong>{name}</strong> | List: <strong>{list_num}</strong> | 日期: {date}
+            <span class="page-num">第 {page_num}/{pages} 页</span>
+        </div>
+        '''
+
+CARD = '''
+            <div class="card">
+                <div class="left">
+                    <div class="meaning-line"><span class="cn-tag">中</span><span>{meaning}</span></div>
+                    <div class="cloze">"{masked}"</div>
+                    <div class="meta">
+                        <div>📅 Ebb: <span class="box"></span>1 <span class="box"></span>2 <span class="box"></span>4 <span class="box"></span>7 <span class="box"></span>15</div>
+                        <div>🗂 Box: <span class="box"></span>New <span class="box"></span>Blur <span class="box"></span>Done</div>
+                    </div>
+                </div>
+                <div class="right">
+                    <h3 style="margin:0 0 4px;font-size:19px;">{word}</h3>
+                    <div style="color:#666;font-family:'Times New Roman';font-size:13px;margin-bottom:5px">{phonetic}</div>
+                    <div style="font-size:10px;color:#999;font-weight:bold">COLLOCATION</div>
+                    <div style="font-size:12px;line-height:1.3;margin-bottom:5px">{collocation}</div>
+                    <div style="font-size:10px;color:#999;font-weight:bold">SENTENCE</div>
+                    <div class="sentence">{sentence}</div>
+                </div>
+            </div>
+            '''
+
+REVIEW = '''
+            <div class="review" style="border-top: none !important;">  <!-- 移除虚线 -->
+                <div style="font-weight:bold;color:#666;margin-bottom:10px;">📝 本页单词随机复习：</div>
+                <div style="line-height:1.8;">
+                    {lines}
+                </div>
+            </div>
+            '''
+
+_CJK = re.compile(r'[\u4e00-\u9fa5]')
+# 向量化版本用的模式写成实际字符（pyarrow 字符串后端的 RE2 不认 \u 转义）
+_CJK_CLASS = '[\u4e00-\u9fa5]'
+_CJK_TAIL = '(?s)' + _CJK_CLASS + '.*'
+# 除 ASCII、中文与常用全角/通用标点之外的字符：这类句子里 lower() 与 IGNORECASE 的匹配结果可能不同，逐行走正则
+_UNCOMMON = re.compile(r'[^\x00-\x7f\u4e00-\u9fa5\u2000-\u206f\u3000-\u303f\uff00-\uffef]')
+
+# 每个词库版本预先算好、随记录一起缓存的派生字段，渲染时只做模板替换
+DERIVED = ("Masked", "Example_EN", "Collocation_EN")
+
+
+def get_masked_sentence(sentence, word):
+    if not isinstance(sentence, str): return ""
+    pattern = re.compile(re.escape(word), re.IGNORECASE)
+    return pattern.sub("_______", sentence)
+
+
+def extract_english_only(sentence):
+    if not isinstance(sentence, str): return ""
+    match = _CJK.search(sentence)
+    if match: return sentence[:match.start()].strip()
+    return sentence
+
+
+def _mask(sentence, word):
+    # 与 get_masked_sentence 结果相同，但不为每个单词编译正则：在小写副本里定位，再从原句切片
+    low_word = word.lower()
+    if not word or len(low_word) != len(word) or _UNCOMMON.search(sentence):
+        return get_masked_sentence(sentence, word)
+    parts = sentence.lower().split(low_word)
+    if len(parts) == 1:
+        return sentence
+    out, pos = [], 0
+    for part in parts[:-1]:
+        out.append(sentence[pos:pos + len(part)])
+        out.append("_______")
+        pos += len(part) + len(word)
+    out.append(sentence[pos:])
+    return "".join(out)
+
+
+def _english_only(series):
+    # extract_english_only 的向量化版本：有中文时取中文之前的部分并去空白，否则原样
+    has_cjk = series.str.contains(_CJK_CLASS, regex=True)
+    return series.str.replace(_CJK_TAIL, "", regex=True).str.strip().where(has_cjk, series)
+
+
+def derive_fields(df):
+    """
+    整个词库一次性计算派生字段（与 render_card 原先逐张计算的结果一致）
+    :return: 与 df 同索引、列为 DERIVED 的 DataFrame
+    """
+    import pandas as pd  # 只有建索引时需要，批量渲染的子进程不必加载
+
+    def text(col):
+        # 与逐条渲染时的 str(值) 一致：空单元格（NaN）显示为 'nan'；新版 pandas 的 astype(str) 会保留 NaN
+        if col not in df.columns:
+            return pd.Series("", index=df.index)
+        return df[col].astype(str).fillna("nan")
+
+    words, example, collocation = text("Word"), text("Example"), text("Collocation")
+    return pd.DataFrame({
+        "Masked": [_mask(e, w) for e, w in zip(example.tolist(), words.tolist())],
+        "Example_EN": _english_only(example),
+        "Collocation_EN": _english_only(collocation),
+    }, index=df.index)
+
+
+def derive_record(row):
+    """单条记录的派生字段（AI 新增的词条增量计算用），返回带派生字段的新 dict"""
+    word = str(row.get('Word', ''))
+    example = str(row.get('Example', ''))
+    return {**row, "Masked": _mask(example, word), "Example_EN": extract_english_only(example),
+            "Collocation_EN": extract_english_only(str(row.get('Collocation', '')))}
+
+
+def _card_key(row):
+    return (str(row.get('Word', '')), str(row.get('Example', '')), str(row.get('Collocation', '')),
+            str(row.get('Meaning', '')), str(row.get('Phonetic', '')))
+
+
+class FragmentCache:
+    """卡片片段 LRU 缓存，键为决定卡片内容的全部字段"""
+
+    def __init__(self, maxsize=FRAGMENT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def card(self, row):
+        key = _card_key(row)
+        with self._lock:
+            html = self._items.get(key)
+            if html is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return html
+        html = render_card(row)
+        with self._lock:
+            self.misses += 1
+            self._items[key] = html
+            if len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return html
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._items), "hits": self.hits, "misses": self.misses}
+
+
+def render_card(row):
+    # 词库中的记录已带派生字段；其他来源（如刚生成、还没进索引的记录）在这里补算
+    if "Masked" not in row:
+        row = derive_record(row)
+    return CARD.format(
+        meaning=row.get('Meaning', ''),
+        masked=row['Masked'],
+        word=str(row.get('Word', '')),
+        phonetic=row.get('Phonetic', ''),
+        collocation=row['Collocation_EN'],
+        sentence=row['Example_EN'],
+    )
+
+
+fragments = FragmentCache()
+
+
+def _records(words_data):
+    # 兼容 DataFrame 与 dict 列表，列表时不做任何转换
+    return words_data.to_dict('records') if hasattr(words_data, 'to_dict') else list(words_data)
+
+
+def _review_block(words_this_page):
+    # 生成4行随机顺序
+    lines = [words_this_page[:] for _ in range(4)]
+    for line in lines:
+        random.shuffle(line)
+    return REVIEW.format(lines="<br>\n                    ".join(" • ".join(line) for line in lines))
+
+
+def page_count(n_records):
+    return (n_records + CARDS_PER_PAGE - 1) // CARDS_PER_PAGE
+
+
+def render_pages(words_data, student_info, for_printing, cache=fragments, only_page=None):
+    """
+    :param only_page: 只渲染第几页（从 0 开始），其余页面的卡片完全不生成；None 为全部
+    """
+    records = _records(words_data)
+    total = len(records)
+    pages = page_count(total)
+    date = datetime.now().strftime('%Y-%m-%d')
+    starts = range(0, total, CARDS_PER_PAGE)
+    if only_page is not None:
+        starts = starts[only_page:only_page + 1]
+    parts = []
+    for i in starts:
+        page_words = records[i:i + CARDS_PER_PAGE]
+        parts.append('<div class="page">')
+        parts.append(PAGE_HEADER.format(
+            class_name=student_info['class_name'], name=student_info['name'],
+            list_num=student_info['list_num'], date=date,
+            page_num=i // CARDS_PER_PAGE + 1, pages=pages))
+        parts.append('<div class="cards">')
+        parts.extend(cache.card(r) for r in page_words)
+        parts.append('</div>')
+        if for_printing and page_words:
+            parts.append(_review_block([r['Word'] for r in page_words]))
+        parts.append('</div>')
+    return "".join(parts)
+
+
+def render_document(words_data, student_info, for_printing=False, cache=fragments, only_page=None):
+    return "".join([
+        DOC_HEAD.format(name=student_info['name']),
+        STYLE,
+        DOC_BODY,
+        "" if for_printing else HEADER_TIP,
+        "\n    ",
+        render_pages(words_data, student_info, for_printing, cache, only_page),
+        "\n    ",
+        AUTO_PRINT if for_printing else "",
+        DOC_TAIL,
+    ])
@@ -0,0 +1,19 @@
+# ================= 基础配置 =================
+# 数据文件都放在项目根目录（app.py 旁边），与原先保持一致
+import os
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_FILE = os.path.join(BASE_DIR, "Total_Words.xlsx")
+STORE_FILE = os.path.join(BASE_DIR, "Total_Words.sqlite")  # 词库主存储，xlsx 仅用于导入/导出
+HISTORY_FILE = os.path.join(BASE_DIR, "student_print_history.csv")
+LOGO_PATH = os.path.join(BASE_DIR, "logo.png")
+AI_CACHE_FILE = os.path.join(BASE_DIR, "ai_cache.sqlite")  # AI 生成结果缓存（跨会话、跨重启）
+METRICS_FILE = os.path.join(BASE_DIR, "metrics.json")  # 进程级耗时汇总，定期写出
+
+DEFAULT_BASE_URL = "https://api.deepseek.com"
+AI_CHUNK_SIZE = 8     # 每次请求的单词数
+AI_MAX_WORKERS = 4    # 同时进行的请求数
+SPELL_CUTOFF = 0.8    # 自动纠正的相似度阈值
+WRITE_DEBOUNCE_SECONDS = 1.0   # 新词后台写入：最后一次提交后等待多久再写
+WRITE_MAX_DELAY_SECONDS = 5.0  # 持续有新词时最多攒多久
+UPLOAD_MAX_WORDS = 2000       # 上传单词表最多读取的不同单词数
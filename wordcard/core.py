@@ -0,0 +1,166 @@
+# ================= 数据与业务函数 =================
+# 原先定义在 app.py 顶层的函数，移到这里后：
+#   - 只在进程里导入一次，页面重跑不再重新执行这些定义
+#   - 批量任务、基准、其他 worker 不启动 Streamlit 也能直接调用
+# AI 流水线（以及 openai SDK）只在真的有生词时才导入。
+import difflib
+import os
+
+import pandas as pd
+
+from . import ai_cache, card_render, config, history_store, metrics, review, word_store
+from .word_bank import add_words, load_word_bank, load_word_index, word_bank_stats
+
+# 各缓存的命中率、淘汰数等随 metrics 快照导出（metrics.json、Prometheus、调试面板）
+metrics.registry.register("word_bank", word_bank_stats)
+metrics.registry.register("ai_cache", lambda: ai_cache.get_cache(config.AI_CACHE_FILE).stats())
+metrics.registry.register("card_fragments", card_render.fragments.stats)
+
+
+def load_or_create_data():
+    if not os.path.exists(config.DATA_FILE) and not os.path.exists(config.STORE_FILE):
+        data = {"Word": ["ambition"],"Phonetic": ["/æmˈbɪʃn/"],"Meaning": ["n. 雄心，抱负"],
+                "Example": ["She has a great ambition to become a doctor. 她有一个成为医生的宏大抱负。"],
+                "Collocation": ["great ambition"]}
+        word_store.write_frame(config.STORE_FILE, pd.DataFrame(data))
+    # 进程级缓存：文件未变化时直接复用；xlsx 比存储新时自动导入
+    with metrics.span("load_word_bank"):
+        return load_word_bank(config.DATA_FILE, config.STORE_FILE)
+
+
+def load_index():
+    # 预先构建的 小写单词->记录 索引，每个词库版本只建一次，所有会话共享
+    load_or_create_data()
+    return load_word_index(config.DATA_FILE, config.STORE_FILE)
+
+
+def save_new_words_to_excel(new_words_list):
+    # 新词立即在内存词库中可见；写入 SQLite 存储（同词以新生成的为准）由后台线程防抖合并后完成，
+    # 需要 xlsx 时运行 python -m wordcard.word_store export
+    if not new_words_list: return
+    add_words(config.DATA_FILE, config.STORE_FILE, new_words_list)
+
+
+def load_history(student=None, class_name=None, list_num=None):
+    # 按需读取（走增量折叠后的索引库），页面重跑时不再读整个 CSV
+    return history_store.query_history(config.HISTORY_FILE, student, class_name, list_num)
+
+
+def save_history(new_rows):
+    # 只追加本次打印的行，不再重写整个文件
+    with metrics.span("history_append"):
+        history_store.append_history(config.HISTORY_FILE, new_rows)
+
+
+def review_words(class_name, student, today=None):
+    # 按打印记录（1/2/4/7/15 天间隔）算出今天到期的复习词，整份历史的聚合在进程内缓存
+    with metrics.span("review_queue"):
+        return review.due_words(config.HISTORY_FILE, class_name, student, today)
+
+
+def print_records(word_ids, word_index=None):
+    """
+    会话打印列表（词库 ID，即小写单词）-> 共享词库中的记录，保持列表顺序。
+    会话里不再保存整行记录的副本；词库中已不存在的单词跳过。
+    """
+    if word_index is None:
+        word_index = load_index()
+    found, _ = word_index.lookup(word_ids)
+    return found
+
+
+def find_similar_words(input_word, word_list, cutoff=0.94):
+    """
+    查找相似的单词，用于拼写检查
+    :param input_word: 用户输入的单词
+    :param word_list: 词库中的单词列表，或预先构建的 SpellCorrector
+    :param cutoff: 相似度阈值（0-1之间）
+    :return: 最相似的单词列表
+    """
+    if hasattr(word_list, "get_close_matches"):
+        return word_list.get_close_matches(input_word.lower(), n=3, cutoff=cutoff)
+    similar_words = difflib.get_close_matches(input_word.lower(), word_list, n=3, cutoff=cutoff)
+    return similar_words
+
+
+def generate_words_by_ai(words_list, api_key, base_url=config.DEFAULT_BASE_URL, on_progress=None):
+    """
+    分批并发生成；部分批次失败时仍返回成功的部分
+    :return: (records, failed_words)
+    """
+    if not words_list: return [], []
+    from . import ai_pipeline
+    with metrics.span("ai_generate"):
+        records, failed = ai_pipeline.generate_words(
+            words_list, api_key, base_url,
+            chunk_size=config.AI_CHUNK_SIZE, max_workers=config.AI_MAX_WORKERS, on_progress=on_progress,
+            cache=ai_cache.get_cache(config.AI_CACHE_FILE))
+    metrics.incr("words_generated", len(records))
+    return records, failed
+
+
+def resolve_words(words, word_index=None, api_key=None, base_url=config.DEFAULT_BASE_URL, on_progress=None):
+    """
+    查词库 -> 拼写纠正（取最相似）-> AI 补全并入库
+    :return: (resolved, corrections, failed)
+             resolved 为 {输入单词: 词条}，corrections 为 {输入单词: 纠正后的单词}
+    """
+    if word_index is None:
+        word_index = load_index()
+    words = list(dict.fromkeys(words))
+    resolved, corrections, missing = {}, {}, []
+    with metrics.span("lookup"):
+        found, not_found = word_index.lookup(words)
+    not_found_set = set(not_found)
+    resolved.update(zip((w for w in words if w not in not_found_set), found))
+    metrics.incr("words_looked_up", len(words))
+    with metrics.span("spellcheck"):
+        for w in not_found:
+            similar = find_similar_words(w, word_index.speller, cutoff=config.SPELL_CUTOFF)
+            if similar:
+                corrections[w] = similar[0]
+                resolved[w] = word_index.get(similar[0])
+            else:
+                missing.append(w)
+    metrics.incr("words_corrected", len(corrections))
+
+    failed = []
+    if missing:
+        if not api_key:
+            return resolved, corrections, missing
+        records, failed = generate_words_by_ai(missing, api_key, base_url, on_progress)
+        save_new_words_to_excel(records)
+        from .ai_cache import normalize
+        by_word = {normalize(r["Word"]): r for r in records}
+        for w in missing:
+            rec = by_word.get(normalize(w))
+            if rec is not None:
+                resolved[w] = rec
+            elif w not in failed:
+                failed.append(w)
+    return resolved, corrections, failed
+
+
+# ================= HTML 生成=================
+# 模板与卡片片段缓存在 card_render 中，预览和打印复用同一批卡片片段
+def generate_clean_html(words_data, student_info, for_printing=False):
+    with metrics.span("render_print" if for_printing else "render_preview"):
+        html = card_render.render_document(words_data, student_info, for_printing)
+    metrics.incr("cards_rendered", len(words_data))
+    return html
+
+
+def generate_preview_page(words_data, student_info, page):
+    # 预览只渲染当前这一页，列表再长发给浏览器的内容也只有一页
+    with metrics.span("render_preview"):
+        html = card_render.render_document(words_data, student_info, False, only_page=page)
+    metrics.incr("cards_rendered", min(card_render.CARDS_PER_PAGE, len(words_data) - page * card_render.CARDS_PER_PAGE))
+    return html
+
+
+def preview_page_count(words_data):
+    return card_render.page_count(len(words_data))
+
+
+def _generate_pages(words_data, student_info, for_printing):
+    return card_render.render_pages(words_data, student_info, for_printing)
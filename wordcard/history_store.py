@@ -0,0 +1,216 @@
+# ================= 打印记录存储 =================
+# student_print_history.csv 改为只追加的日志：
+#   - 下载时只在文件末尾追加本次的行（文件锁 + 单次 write），不再读-合并-重写整个文件，
+#     两个会话同时下载也不会互相覆盖
+#   - 平时不读取历史，只有真正需要查询时才读
+#   - compact() 把日志中新增的部分增量折叠进 SQLite（按学生/班级/List 建索引），
+#     CSV 本身保持完整、可直接用 Excel 打开
+import csv
+import hashlib
+import io
+import os
+import sqlite3
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows：没有 flock，退化为依赖 O_APPEND 的单次写入
+    fcntl = None
+
+COLUMNS = ["Student", "Class", "List_Num", "Word", "Print_Date"]
+
+
+@contextmanager
+def _locked(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    try:
+        yield f
+    finally:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def index_path(log_path):
+    return os.path.splitext(log_path)[0] + ".sqlite"
+
+
+def append_history(log_path, rows):
+    """
+    追加打印记录
+    :param rows: dict 列表或 DataFrame，列为 COLUMNS
+    :return: 追加的行数
+    """
+    if isinstance(rows, pd.DataFrame):
+        rows = rows.to_dict('records')
+    if not rows: return 0
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    for r in rows:
+        writer.writerow(["" if r.get(c) is None else r.get(c) for c in COLUMNS])
+    body = buf.getvalue().encode("utf-8")
+
+    fd = os.open(log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    with os.fdopen(fd, "ab") as f, _locked(f):
+        size = os.fstat(f.fileno()).st_size
+        prefix = b""
+        if size == 0:
+            prefix = (",".join(COLUMNS) + "\n").encode("utf-8")
+        else:
+            # 手动编辑过的文件可能缺少结尾换行
+            with open(log_path, "rb") as r:
+                r.seek(size - 1)
+                if r.read(1) != b"\n":
+                    prefix = b"\n"
+        f.write(prefix + body)
+        f.flush()
+    return len(rows)
+
+
+def _connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS history ("
+        "Student TEXT, Class TEXT, List_Num TEXT, Word TEXT, Print_Date TEXT)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS history_student ON history (Class, Student, List_Num)")
+    conn.execute("CREATE INDEX IF NOT EXISTS history_list ON history (List_Num)")
+    return conn
+
+
+def _get_meta(conn, key, default=None):
+    row = conn.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+    return row[0] if row else default
+
+
+def _fingerprint(f, offset):
+    # 文件开头与 offset 之前各 4KB 的摘要：日志被就地改写（哪怕变长）后与上次读到的位置对不上
+    f.seek(0)
+    head = f.read(min(offset, 4096))
+    f.seek(max(0, offset - 4096))
+    tail = f.read(min(offset, 4096))
+    return hashlib.sha1(head + tail).hexdigest()
+
+
+def _stamp(st, fingerprint):
+    return f"{st.st_ino}:{st.st_mtime_ns}:{fingerprint}"
+
+
+def unchanged(log_path, offset, stamp):
+    """日志自上次读到 offset（read_since 返回的 stamp）以来既没有追加也没有被改写"""
+    if stamp is None or not os.path.exists(log_path):
+        return False
+    st = os.stat(log_path)
+    return st.st_size == offset and stamp.startswith(f"{st.st_ino}:{st.st_mtime_ns}:")
+
+
+def _read_from(log_path, offset, stamp):
+    # 加锁读取 offset 之后的字节。以下情况从头读：
+    #   offset 为 0、日志变小、换了文件（inode 不同）、大小没变但被改过（mtime 不同）、
+    #   开头或 offset 之前的内容与上次不同（被手动改写后变长）
+    with open(log_path, "rb") as f, _locked(f):
+        st = os.fstat(f.fileno())
+        size = st.st_size
+        rebuild = size < offset or offset == 0 or stamp is None
+        if not rebuild:
+            ino, mtime, fingerprint = stamp.split(":")
+            if int(ino) != st.st_ino:
+                rebuild = True
+            elif size == offset:
+                rebuild = int(mtime) != st.st_mtime_ns
+            else:
+                rebuild = fingerprint != _fingerprint(f, offset)
+        start = 0 if rebuild else offset
+        f.seek(start)
+        chunk = f.read(size - start)
+        return chunk, size, rebuild, _stamp(st, _fingerprint(f, size))
+
+
+def read_since(log_path, offset=0, header=None, stamp=None):
+    """
+    读取日志中 offset 之后追加的行；日志被截断、替换或改写过时从头读
+    :param header: 上次读取时得到的表头（追加的行没有表头）
+    :param stamp: 上次读取时返回的 stamp，用来识别日志是否被改写
+    :return: (DataFrame, 新 offset, 表头, 新 stamp, 是否从头读)，DataFrame 的列为 COLUMNS
+    """
+    if not os.path.exists(log_path):
+        return pd.DataFrame(columns=COLUMNS), 0, None, None, True
+    chunk, size, rebuild, stamp = _read_from(log_path, offset, stamp)
+    if rebuild:
+        header = None
+    if not chunk.strip():
+        return pd.DataFrame(columns=COLUMNS), size, header, stamp, rebuild
+    if header is None:
+        df = pd.read_csv(io.BytesIO(chunk), dtype=str, keep_default_na=False, encoding="utf-8-sig")
+        header = list(df.columns)
+    else:
+        df = pd.read_csv(io.BytesIO(chunk), header=None, names=header, index_col=False, dtype=str,
+                         keep_default_na=False, encoding="utf-8")
+    return df.reindex(columns=COLUMNS).fillna(""), size, header, stamp, rebuild
+
+
+def compact(log_path, db_path=None):
+    """
+    把日志中上次折叠之后追加的行写入索引库，返回本次新增行数。
+    日志被截断、替换或手动改写过时整库重建。
+    """
+    db_path = db_path or index_path(log_path)
+    if not os.path.exists(log_path):
+        return 0
+    conn = _connect(db_path)
+    conn.isolation_level = None
+    try:
+        # 先拿写锁再读 offset，避免两个会话同时折叠同一段日志
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            offset = int(_get_meta(conn, "offset", 0))
+            chunk, size, rebuild, stamp = _read_from(log_path, offset, _get_meta(conn, "stamp"))
+            if not rebuild and size == offset:
+                conn.execute("ROLLBACK")
+                return 0
+            reader = csv.reader(io.StringIO(chunk.decode("utf-8-sig")))
+            if rebuild:
+                header = next(reader, None) or COLUMNS
+                conn.execute("DELETE FROM history")
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('header', ?)", (",".join(header),))
+            else:
+                header = _get_meta(conn, "header", ",".join(COLUMNS)).split(",")
+            pos = [header.index(c) if c in header else None for c in COLUMNS]
+            rows = [
+                [row[i] if i is not None and i < len(row) else "" for i in pos]
+                for row in reader if row
+            ]
+            conn.executemany("INSERT INTO history VALUES (?, ?, ?, ?, ?)", rows)
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('offset', ?)", (str(size),))
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('stamp', ?)", (stamp,))
+            conn.execute("COMMIT")
+            return len(rows)
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+
+def query_history(log_path, student=None, class_name=None, list_num=None):
+    """按学生/班级/List 查询历史（先做一次增量折叠），返回 DataFrame"""
+    db_path = index_path(log_path)
+    compact(log_path, db_path)
+    where, args = [], []
+    for col, val in (("Student", student), ("Class", class_name), ("List_Num", list_num)):
+        if val is not None:
+            where.append(f"{col}=?")
+            args.append(str(val))
+    sql = "SELECT Student, Class, List_Num, Word, Print_Date FROM history"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    conn = _connect(db_path)
+    try:
+        rows = conn.execute(sql + " ORDER BY rowid", args).fetchall()
+    finally:
+        conn.close()
+    return pd.DataFrame.from_records(rows, columns=COLUMNS)
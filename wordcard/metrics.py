@@ -0,0 +1,222 @@
+# ================= 性能计时与指标 =================
+# 轻量的 span 计时 + 计数器：
+#   - 每次页面重跑对应一个 Trace（记录本次各阶段耗时与计数），供侧边栏调试面板显示
+#   - 进程级汇总（直方图 + 最近样本 + 登记的缓存状态）写入本地 JSON 文件，或通过 Prometheus 文本格式暴露
+# 不依赖 Streamlit，批量任务/基准也可以直接使用。
+import bisect
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+RECENT_SAMPLES = 2048
+EXPORT_INTERVAL = 10.0
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, ms):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.total += 1
+        self.sum_ms += ms
+        self.recent.append(ms)
+
+    def quantile(self, q):
+        if not self.recent: return 0.0
+        data = sorted(self.recent)
+        return data[min(len(data) - 1, int(q * (len(data) - 1) + 0.5))]
+
+    def summary(self):
+        return {"count": self.total, "sum_ms": round(self.sum_ms, 3),
+                "p50_ms": round(self.quantile(0.5), 3), "p95_ms": round(self.quantile(0.95), 3),
+                "p99_ms": round(self.quantile(0.99), 3),
+                "buckets": dict(zip([str(b) for b in BUCKETS_MS] + ["+Inf"], self.counts))}
+
+
+class Registry:
+    """进程级汇总"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.collectors = {}
+        self._last_export = 0.0
+
+    def observe(self, name, ms):
+        with self._lock:
+            h = self.histograms.get(name)
+            if h is None:
+                h = self.histograms[name] = Histogram()
+            h.observe(ms)
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def register(self, name, fn):
+        """登记一个状态采集函数（返回 dict，如各缓存的 stats()），随快照一起导出"""
+        with self._lock:
+            self.collectors[name] = fn
+
+    def collect(self):
+        with self._lock:
+            collectors = list(self.collectors.items())
+        stats = {}
+        for name, fn in collectors:  # 在锁外调用，采集函数可能要查库
+            try:
+                stats[name] = fn()
+            except Exception as e:
+                stats[name] = {"error": repr(e)}
+        return stats
+
+    def snapshot(self):
+        stats = self.collect()
+        with self._lock:
+            return {"time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "counters": dict(self.counters),
+                    "timings": {k: h.summary() for k, h in self.histograms.items()},
+                    "stats": stats}
+
+    def write_json(self, path):
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+
+    def maybe_export(self, path, interval=EXPORT_INTERVAL):
+        """距离上次导出超过 interval 秒才写文件，避免每次重跑都写盘"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_export < interval:
+                return False
+            self._last_export = now
+        self.write_json(path)
+        return True
+
+    def prometheus_text(self, prefix="wordcard"):
+        lines = []
+        # 采集到的状态只导出顶层的数值（命中率、条目数等），作为 gauge
+        for name, values in sorted(self.collect().items()):
+            for key, value in sorted(values.items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    metric = f"{prefix}_{name}_{key}"
+                    lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                metric = f"{prefix}_{name}_total"
+                lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+            for name, h in sorted(self.histograms.items()):
+                metric = f"{prefix}_{name}_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                cumulative = 0
+                for bound, count in zip(list(BUCKETS_MS) + [None], h.counts):
+                    cumulative += count
+                    le = "+Inf" if bound is None else repr(bound / 1000)
+                    lines.append(f'{metric}_bucket{{le="{le}"}} {cumulative}')
+                lines += [f"{metric}_sum {h.sum_ms / 1000}", f"{metric}_count {h.total}"]
+        return "\n".join(lines) + "\n"
+
+
+class Trace:
+    """一次页面重跑内的各阶段耗时与计数"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.last = self.started
+        self.spans = []
+        self.counters = {}
+        self.finished = False
+        self.total_ms = 0.0
+
+
+registry = Registry()
+_local = threading.local()
+
+
+def start_trace():
+    trace = Trace()
+    _local.trace = trace
+    return trace
+
+
+def current_trace():
+    return getattr(_local, "trace", None)
+
+
+def finish_trace(trace, name="rerun", interrupted=False):
+    """
+    结束一次重跑并计入直方图。st.stop()/st.rerun() 会打断脚本，
+    所以下一次重跑开始时会以 interrupted=True 补一次（以最后一次 span 结束时间为准）。
+    """
+    if trace is None or trace.finished:
+        return
+    trace.finished = True
+    end = trace.last if interrupted else time.perf_counter()
+    trace.total_ms = (end - trace.started) * 1000
+    registry.observe(name, trace.total_ms)
+    if getattr(_local, "trace", None) is trace:
+        _local.trace = None
+
+
+@contextmanager
+def span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        ms = (end - start) * 1000
+        registry.observe(name, ms)
+        trace = current_trace()
+        if trace is not None:
+            trace.spans.append((name, ms))
+            trace.last = end
+
+
+def incr(name, n=1):
+    if not n: return
+    registry.incr(name, n)
+    trace = current_trace()
+    if trace is not None:
+        trace.counters[name] = trace.counters.get(name, 0) + n
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def serve(port, host="127.0.0.1"):
+    """在后台线程提供 /metrics（Prometheus 文本格式），进程内只启动一次"""
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return _server
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        _server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=_server.serve_forever, daemon=True).start()
+        return _server
@@ -0,0 +1,220 @@
+# ================= 复习队列 =================
+# 卡片上印着 "Ebb: 1 2 4 7 15"，这里按打印记录算出每个学生今天该复习哪些词：
+#   - 每个 (班级, 学生, 单词) 的第一次打印日期视为学会的那天
+#   - 之后每多一个不同的打印日期算完成一轮复习
+#   - 第 k 轮复习在第一次打印后 INTERVALS[k] 天到期；错过的不会消失，一直留在队列里直到再次打印
+#   - 5 轮都完成后不再出现
+# 整个历史一次 groupby 聚合（不逐行循环），结果按 (班级, 学生) 建索引并在进程内缓存，
+# 同一进程里各个会话、整班查询都共用这一份聚合；日志追加后只把新增的行并入，不重读整个文件。
+import os
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from .history_store import read_since, unchanged
+
+INTERVALS = (1, 2, 4, 7, 15)
+KEYS = ["Class", "Student", "Word"]
+
+
+def _prepare(history):
+    # 清洗并去掉同一天的重复打印，返回列为 KEYS + Print_Date 的 DataFrame
+    # 不同的打印日期只有几百个，先去重再解析
+    codes, uniques = pd.factorize(history["Print_Date"])
+    dates = pd.to_datetime(pd.Series(uniques, dtype=object), format="%Y-%m-%d", errors="coerce").to_numpy()
+    dates = np.append(dates, np.datetime64("NaT"))[codes]
+    h = pd.DataFrame({
+        "Class": history["Class"].astype(str),
+        "Student": history["Student"].astype(str),
+        "Word": history["Word"].astype(str).str.strip().str.lower(),
+        "Print_Date": dates,
+    })
+    h = h[h["Print_Date"].notna() & (h["Word"] != "")]
+    # 同一天重复打印只算一次
+    return h.drop_duplicates(KEYS + ["Print_Date"])
+
+
+def _count(h):
+    return h.groupby(KEYS, sort=False)["Print_Date"].agg(first="min", prints="size").reset_index()
+
+
+def _next_due(first, prints):
+    stage = prints - 1
+    offsets = np.append(np.array(INTERVALS, dtype="int64"), -1)[np.minimum(stage, len(INTERVALS))]
+    next_due = first + pd.to_timedelta(offsets, unit="D")
+    return next_due.where(stage < len(INTERVALS))
+
+
+def aggregate(history):
+    """
+    按 (班级, 学生, 单词) 聚合打印记录
+    :param history: 列为 COLUMNS 的 DataFrame
+    :return: 以 (Class, Student) 为索引的 DataFrame，列为 Word / first / prints / next_due
+             next_due 为下一轮复习的到期日，全部完成时为 NaT
+    """
+    return _build(_prepare(history))
+
+
+def _build(h):
+    agg = _count(h)
+    agg["next_due"] = _next_due(agg["first"], agg["prints"].to_numpy())
+    return agg.set_index(["Class", "Student"]).sort_index()
+
+
+def _hash(frame):
+    # 字符串列先转成分类再哈希，结果与直接哈希字符串相同，但每个不同的值只算一次
+    frame = frame.astype({c: "category" for c in frame.columns if frame[c].dtype.kind not in "iufmM"})
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+def seen_pairs(history):
+    """history 中已计入的 (班级, 学生, 单词, 日期) 的哈希（升序），即 fold() 的 seen 参数"""
+    return np.sort(_hash(_prepare(history)))
+
+
+def fold(agg, seen, history):
+    """
+    把新追加的打印记录并入已有聚合，不重新计算整个历史；结果与 aggregate(全部记录) 相同（含行顺序）
+    :param agg: aggregate() 的结果
+    :param seen: 已计入的 (班级, 学生, 单词, 日期) 的哈希，升序的 uint64 数组（见 seen_pairs）
+    :param history: 新追加的打印记录，列为 COLUMNS
+    :return: (新的 agg, 新的 seen)；没有新的打印日期时原样返回
+    """
+    h = _prepare(history)
+    # 之前已经算过的同一天打印不再计数
+    pairs = _hash(h)
+    if len(seen) and len(pairs):
+        known = seen.take(np.searchsorted(seen, pairs), mode="clip") == pairs
+        h, pairs = h[~known], pairs[~known]
+    if h.empty:
+        return agg, seen
+    pairs = np.sort(pairs)
+    seen = np.insert(seen, np.searchsorted(seen, pairs), pairs)
+
+    # agg 按 (班级, 学生) 排好序，只取受影响学生的那几段与新增的计数合并
+    upd = _count(h)
+    groups = upd[["Class", "Student"]].drop_duplicates(ignore_index=True)
+    bounds = np.array([agg.index.slice_locs(k, k) for k in groups.itertuples(index=False, name=None)],
+                      dtype="int64").reshape(-1, 2)
+    groups["_at"] = bounds[:, 1]  # 组尾：该学生的新单词插在这里
+    pos = np.concatenate([np.arange(lo, hi) for lo, hi in bounds])
+    current = agg.iloc[pos].reset_index()[KEYS].assign(_pos=pos)
+    merged = upd.merge(current, on=KEYS, how="left")
+    old = merged["_pos"].notna().to_numpy()
+
+    at = merged["_pos"].to_numpy()[old].astype("int64")
+    first = agg["first"].to_numpy().copy()
+    prints = agg["prints"].to_numpy().copy()
+    next_due = agg["next_due"].to_numpy().copy()
+    first[at] = np.minimum(first[at], merged["first"].to_numpy()[old])
+    prints[at] += merged["prints"].to_numpy()[old]
+    # 只重算变化的行的到期日
+    next_due[at] = _next_due(pd.Series(first[at]), prints[at]).to_numpy()
+    base = agg.assign(first=first, prints=prints, next_due=next_due)
+
+    if not old.all():
+        # 新单词按 (班级, 学生) 稳定排序后插到各自的组尾，组内保持第一次出现的顺序；
+        # 不同学生可能共用同一个插入点（如同班新来的学生），排序后插入点单调不减
+        new = merged[~old].drop(columns="_pos").merge(groups, on=["Class", "Student"], how="left")
+        new = new.sort_values(["Class", "Student"], kind="stable")
+        new_at = new.pop("_at").to_numpy()
+        new = new.set_index(["Class", "Student"])
+        new["next_due"] = _next_due(new["first"], new["prints"].to_numpy())
+        order = np.insert(np.arange(len(base)), new_at, len(base) + np.arange(len(new)))
+        base = pd.concat([base, new]).iloc[order]
+    return base, seen
+
+
+def due(agg, today=None):
+    """agg（或其中一部分）中今天到期的行，最早到期的排在前面"""
+    today = pd.Timestamp(today or date.today())
+    rows = agg[agg["next_due"] <= today]
+    return rows.sort_values(["next_due", "first"], kind="stable")
+
+
+class ReviewCache:
+    """
+    进程级复习聚合缓存。记住日志读到的位置，日志追加后只读新增的部分并入已有聚合；
+    日志被截断、替换或手动改写过时从头重算。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._path = None
+        self._offset = 0
+        self._header = None
+        self._stamp = None
+        self._seen = None
+        self._agg = None
+        self.version = 0
+
+    def get(self, log_path):
+        with self._lock:
+            if self._agg is not None and self._path == log_path and unchanged(log_path, self._offset, self._stamp):
+                return self._agg
+            offset, stamp = (self._offset, self._stamp) if self._path == log_path else (0, None)
+            history, self._offset, self._header, self._stamp, rebuilt = read_since(
+                log_path, offset, self._header, stamp)
+            self._path = log_path
+            if rebuilt or self._agg is None:
+                h = _prepare(history)
+                self._agg = _build(h)
+                self._seen = np.sort(_hash(h))
+                self.version += 1
+            else:
+                agg, self._seen = fold(self._agg, self._seen, history)
+                if agg is not self._agg:
+                    self._agg = agg
+                    self.version += 1
+            return self._agg
+
+
+_cache = ReviewCache()
+
+
+def review_queue(log_path, class_name=None, student=None, today=None):
+    """
+    今天到期的复习词
+    :param class_name: 只看某个班级；None 为全部
+    :param student: 只看某个学生（需同时给出班级）
+    :return: DataFrame，列为 Class / Student / Word / first / prints / next_due
+    """
+    agg = _cache.get(log_path)
+    if class_name is not None:
+        try:
+            if student is None:
+                agg = agg.xs(str(class_name), level="Class", drop_level=False)
+            else:
+                agg = agg.loc[[(str(class_name), str(student))]]
+        except KeyError:
+            agg = agg.iloc[0:0]
+    rows = due(agg, today)
+    return rows.reset_index().reindex(columns=["Class", "Student", "Word", "first", "prints", "next_due"])
+
+
+def due_words(log_path, class_name, student, today=None):
+    """某个学生今天该复习的单词列表"""
+    return review_queue(log_path, class_name, student, today)["Word"].tolist()
+
+
+if __name__ == "__main__":
+    # 输出整班的复习名单，格式与 wordcard.batch 的名单 CSV 一致：班级,姓名,List编号,单词...
+    import argparse
+    import csv
+    import sys
+
+    from . import config
+
+    parser = argparse.ArgumentParser(description="按打印记录生成今天的复习名单")
+    parser.add_argument("--class", dest="class_name")
+    parser.add_argument("--date", help="按哪一天计算，默认今天（YYYY-MM-DD）")
+    parser.add_argument("--history", default=config.HISTORY_FILE)
+    args = parser.parse_args()
+
+    queue = review_queue(args.history, args.class_name, today=args.date)
+    list_name = f"Review {args.date or date.today().isoformat()}"
+    writer = csv.writer(sys.stdout, lineterminator="\n")
+    for (class_name, student), group in queue.groupby(["Class", "Student"], sort=False):
+        writer.writerow([class_name, student, list_name] + group["Word"].tolist())
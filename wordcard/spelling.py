@@ -0,0 +1,67 @@
+# ================= 拼写纠正索引 =================
+# difflib.get_close_matches 会对词库中的每个单词跑一遍 SequenceMatcher。
+# 这里先用两个 difflib 自身也在用的上界把候选词筛掉绝大多数：
+#   1. real_quick_ratio：只看长度，2*min(la,lb)/(la+lb)
+#   2. quick_ratio：字符多重集交集，2*sum(min(ca,cb))/(la+lb)
+# 两者都 >= 真实 ratio，所以被筛掉的词不可能达到阈值；
+# 剩下的少量候选再用同样的 SequenceMatcher 精确计算，
+# 排序规则也与 get_close_matches 相同，结果逐字一致。
+import difflib
+import heapq
+
+import numpy as np
+
+
+class SpellCorrector:
+    """基于词库构建一次，之后每次查询只做向量化筛选 + 少量精确比较"""
+
+    def __init__(self, words):
+        self.words = list(words)
+        chars = sorted({c for w in self.words for c in w})
+        self._col = {c: i for i, c in enumerate(chars)}
+        counts = np.zeros((len(self.words), len(chars)), dtype=np.int16)
+        for row, w in enumerate(self.words):
+            for c in w:
+                counts[row, self._col[c]] += 1
+        self._counts = counts
+        self._lens = np.fromiter((len(w) for w in self.words), dtype=np.int64, count=len(self.words))
+
+    def __len__(self):
+        return len(self.words)
+
+    def get_close_matches(self, word, n=3, cutoff=0.6):
+        """与 difflib.get_close_matches(word, words, n, cutoff) 返回相同结果"""
+        if not n > 0:
+            raise ValueError("n must be > 0: %r" % (n,))
+        if not 0.0 <= cutoff <= 1.0:
+            raise ValueError("cutoff must be in [0.0, 1.0]: %r" % (cutoff,))
+        if not word or not self.words:
+            return difflib.get_close_matches(word, self.words, n, cutoff)
+
+        la = len(word)
+        total = self._lens + la
+        # 1. 长度上界
+        mask = 2.0 * np.minimum(self._lens, la) / total >= cutoff
+        rows = np.flatnonzero(mask)
+        if rows.size == 0:
+            return []
+        # 2. 字符多重集交集上界（词库里没有的字符不会产生匹配）
+        qvec = np.zeros(self._counts.shape[1], dtype=np.int16)
+        for c in word:
+            i = self._col.get(c)
+            if i is not None:
+                qvec[i] += 1
+        inter = np.minimum(self._counts[rows], qvec).sum(axis=1)
+        rows = rows[2.0 * inter / total[rows] >= cutoff]
+
+        # 3. 精确计算，参数顺序与 get_close_matches 相同（seq2 为输入单词）
+        result = []
+        s = difflib.SequenceMatcher()
+        s.set_seq2(word)
+        for row in rows:
+            x = self.words[row]
+            s.set_seq1(x)
+            if s.ratio() >= cutoff:
+                result.append((s.ratio(), x))
+        result = heapq.nlargest(n, result)
+        return [x for score, x in result]
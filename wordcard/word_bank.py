@@ -0,0 +1,261 @@
+# ================= 词库缓存 =================
+# Streamlit 每次交互都会重新执行 app.py，但已导入的模块只加载一次，
+# 因此放在这里的缓存在整个进程内共享（所有会话、所有老师）。
+import os
+import threading
+import time
+
+import pandas as pd
+
+from . import card_render, word_store, word_writer
+
+
+class WordIndex:
+    """
+    小写单词 -> 词条记录 的哈希索引。
+    重复单词取词库中第一次出现的那一行（与原先 row.iloc[0] 一致）。
+    记录额外带有 card_render.DERIVED 中的派生字段。
+    记录为共享 dict，调用方不得修改。
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.records = {}
+        if 'Word' in df.columns:
+            # 卡片派生字段（挖空例句等）随索引每个词库版本算一次，存进记录里
+            full = pd.concat([df, card_render.derive_fields(df)], axis=1)
+            columns = list(full.columns)
+            word_pos = columns.index('Word')
+            # 按列取 list 再逐行 zip，比 to_dict('records') 快得多；重复单词不再构造记录
+            for row in zip(*(full[c].tolist() for c in columns)):
+                low = str(row[word_pos]).lower()
+                if low not in self.records:
+                    self.records[low] = dict(zip(columns, row))
+        self.words = list(self.records)  # 拼写检查用的候选词表
+        self._speller = None
+
+    @property
+    def speller(self):
+        """拼写纠正索引，第一次需要纠错时才构建，之后随本索引一起复用"""
+        if self._speller is None:
+            from .spelling import SpellCorrector  # numpy 只在需要纠错时加载
+            self._speller = SpellCorrector(self.words)
+        return self._speller
+
+    def extend(self, df, new_records):
+        """
+        并入新词条后的索引（df 为合并后的词库）：只复制哈希表再更新，不重新遍历整个词库。
+        拼写索引先沿用旧的，新词写入存储后由 WordBankCache.refresh 在锁外重建换入（在此之前新词本来就能精确查到）。
+        """
+        index = WordIndex.__new__(WordIndex)
+        index.df = df
+        index.records = dict(self.records)
+        for rec in new_records:
+            index.records[str(rec['Word']).lower()] = card_render.derive_record(rec)
+        index.words = list(index.records)
+        index._speller = self._speller
+        return index
+
+    def __contains__(self, word):
+        return word.lower() in self.records
+
+    def __len__(self):
+        return len(self.records)
+
+    def get(self, word):
+        return self.records.get(word.lower())
+
+    def lookup(self, words):
+        """一次遍历返回 (找到的记录, 未找到的单词)，均保持输入顺序"""
+        found, missing = [], []
+        records = self.records
+        for w in words:
+            rec = records.get(w.lower())
+            if rec is not None:
+                found.append(rec)
+            else:
+                missing.append(w)
+        return found, missing
+
+
+class WordBankCache:
+    """
+    进程级词库缓存，按文件的 (mtime, size) 判断是否需要重新加载。
+    返回的 DataFrame 为所有会话共享，调用方不得原地修改。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._df = None
+        self._key = None
+        self._index = None
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.last_load_seconds = 0.0
+        self.total_load_seconds = 0.0
+
+    def get(self, key_fn, loader):
+        with self._lock:
+            if self._df is not None and self._key == key_fn():
+                self.hits += 1
+                return self._df
+            self.misses += 1
+            start = time.perf_counter()
+            df = loader()
+            elapsed = time.perf_counter() - start
+            self._df = df
+            self._index = None
+            # 加载过程可能改写了文件（如从 xlsx 导入），加载后再取一次 key
+            self._key = key_fn()
+            self.version += 1
+            self.last_load_seconds = elapsed
+            self.total_load_seconds += elapsed
+            return df
+
+    def index(self, df):
+        """与 get() 返回的 df 对应的单词索引，每个词库版本只构建一次"""
+        with self._lock:
+            if self._index is None or self._index.df is not df:
+                self._index = WordIndex(df)
+            return self._index
+
+    def apply(self, records):
+        """
+        把新词条并入当前缓存的词库（同词以新词条为准，排到末尾，与写入存储后的结果一致），
+        不等后台写入完成查词就能找到。缓存为空时不做任何事，下一次加载会带上未写入的词条。
+        """
+        with self._lock:
+            if self._df is None:
+                return
+            current = self._index if self._index is not None and self._index.df is self._df else None
+            df = _merge(self._df, records, None if current is None else current.records)
+            if current is not None:
+                added = len({str(r.get("Word", "")).lower() for r in records})
+                self._index = current.extend(df, df.tail(added).to_dict('records'))
+            else:
+                self._index = None
+            self._df = df
+            self.version += 1
+
+    def refresh(self, key_fn):
+        """
+        后台写入完成后调用：写入的词条已经由 apply() 并入缓存，只把 key 更新为文件的当前状态，
+        下一次 get() 直接命中，不必重新加载和重建索引。key 中存储文件以外的部分（xlsx）变了时不更新。
+        拼写索引在锁外按当前词表重建，建好后再换入，期间查词不受影响。
+        """
+        with self._lock:
+            key = key_fn()
+            if self._df is None or self._key is None or self._key[:-1] != key[:-1]:
+                return
+            self._key = key
+            index = self._index if self._index is not None and self._index.df is self._df else None
+        if index is None or index._speller is None:
+            return  # 还没用过纠错，第一次需要时会按完整词表构建
+        old = index._speller
+        from .spelling import SpellCorrector
+        speller = SpellCorrector(index.words)
+        with self._lock:
+            if self._index is not None and self._index._speller is old:
+                self._index._speller = speller
+
+    def invalidate(self):
+        with self._lock:
+            self._df = None
+            self._key = None
+            self._index = None
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "rows": 0 if self._df is None else len(self._df),
+                "last_load_seconds": self.last_load_seconds,
+                "total_load_seconds": self.total_load_seconds,
+            }
+
+
+_cache = WordBankCache()
+_add_lock = threading.Lock()
+
+
+def _file_key(path):
+    if not os.path.exists(path):
+        return (path, None)
+    st = os.stat(path)
+    return (path, st.st_mtime_ns, st.st_size)
+
+
+def _merge(df, records, known=None):
+    """
+    :param known: df 对应的 小写单词->记录 索引，给出时新词都不在其中就不必扫描整列
+    """
+    if not records:
+        return df
+    columns = list(df.columns)
+    latest = {str(r.get("Word", "")).lower(): r for r in records}
+    new = pd.DataFrame.from_records([[r.get(c, "") for c in columns] for r in latest.values()],
+                                    columns=columns).astype(str)
+    kept = df
+    if "Word" in df.columns and (known is None or any(low in known for low in latest)):
+        kept = df[~df["Word"].str.lower().isin(latest)]
+    return pd.concat([kept, new], ignore_index=True)
+
+
+def _load(xlsx_path, store_path):
+    # xlsx 被手动改过（或存储文件还不存在）时先导入，再从 SQLite 读取；
+    # 已提交但后台还没写完的新词叠加在上面。pending 必须在读库之前取：
+    # 反过来的话，两次调用之间写线程写完一批并清空 pending，这批词条两边都拿不到
+    word_store.sync_from_excel(xlsx_path, store_path)
+    pending = word_writer.pending(store_path)
+    return _merge(word_store.read_frame(store_path), pending)
+
+
+def load_word_bank(xlsx_path, store_path):
+    """读取词库（命中缓存时既不解析 xlsx 也不查询 SQLite）"""
+    return _cache.get(
+        lambda: (_file_key(xlsx_path), _file_key(store_path)),
+        lambda: _load(xlsx_path, store_path),
+    )
+
+
+def load_word_index(xlsx_path, store_path):
+    """当前词库版本对应的单词索引（进程内共享）"""
+    return _cache.index(load_word_bank(xlsx_path, store_path))
+
+
+def add_words(xlsx_path, store_path, records):
+    """新词条立即在内存词库中可见，同时交给后台写线程写入存储"""
+    records = [r for r in records if r.get("Word")]
+    if not records: return
+    # 写完后只在写线程里更新缓存的 key，存储文件的变化不会让请求路径重新读库
+    writer = word_writer.get_writer(
+        store_path, on_flush=lambda _: _cache.refresh(lambda: (_file_key(xlsx_path), _file_key(store_path))))
+    with _add_lock:  # 内存与存储中同一单词的最终版本保持一致
+        writer.submit(records)
+        _cache.apply(records)
+
+
+def flush_words(store_path, timeout=None):
+    """等待后台写入完成（导出 xlsx 之前调用）"""
+    return word_writer.get_writer(store_path).flush(timeout)
+
+
+def invalidate_word_bank():
+    """词库写入后调用，下一次读取强制重新加载"""
+    _cache.invalidate()
+
+
+def word_bank_stats():
+    """加载耗时与命中/未命中计数，以及后台写入的状态"""
+    stats = _cache.stats()
+    stats["writer"] = word_writer.stats()
+    return stats
+
+
+def word_bank_version():
+    return _cache.version
@@ -0,0 +1,132 @@
+# ================= 单词表导入 =================
+# Step 2 的输入框与上传的单词表（.txt / .csv / .xlsx，例如一整个单元的词表、一次考试的错词表）
+# 走同一条路径：按块/逐行/逐单元格流式切词 -> 小写 -> 按出现顺序去重，再交给 resolve_words 一次性查词库。
+#   - 文件不整体读入内存，xlsx 用 openpyxl 只读模式逐行读取
+#   - 按逗号/空白切分（与原先输入框一致），中文释义、序号、两端的标点被跳过，单词本身不拆开
+#   - 内存只与不重复的单词数有关；超过 max_words 个不同单词时停止读取
+# 有表头且某列名为 Word/单词 时只取这一列。
+import codecs
+import csv
+import io
+import os
+import re
+
+from . import config
+
+TYPES = ["txt", "csv", "xlsx"]
+BLOCK_SIZE = 1 << 20
+# 与原先输入框的 re.split(r'[,\s\n]+') 一致按逗号/空白切分，另外中文释义和中文标点也视为分隔；
+# 单词内部的字符（é、连字符、斜杠、括号等）原样保留，如 café、gray/grey、check（cheque）
+_SEPARATORS = r",，、;；\s\u3000\u4e00-\u9fff"
+_TOKEN = re.compile(f"[^{_SEPARATORS}]+")
+_PARTIAL = re.compile(f"[^{_SEPARATORS}]*")  # 用于反转后的文本：块尾还没结束的词
+# 去掉词两端的序号、引号和句读，如 1. "apple", word;
+_EDGES = re.compile(r"^(?:\d+[.)．]|[-*•·\"'“”‘’.:!?。：！？])+|[\"'“”‘’.:!?。：！？]+$")
+_BRACKETS = {"(": ")", "（": "）", "[": "]"}
+_LETTER = re.compile(r"[^\W\d_]")
+_WORD_COLUMNS = {"word", "words", "单词"}
+
+
+def _clean(token):
+    """
+    单个切分结果 -> 单词；不含字母（序号、纯标点）时返回 None
+    """
+    word = _EDGES.sub("", token)
+    # 整个词被括起来或两端括号不成对时去掉，词内成对的如 refer（to） 保留
+    for open_, close in _BRACKETS.items():
+        if word.startswith(open_) and word.endswith(close):
+            word = word[1:-1]
+        elif word.startswith(open_) and close not in word:
+            word = word[1:]
+        elif word.endswith(close) and open_ not in word:
+            word = word[:-1]
+    return word if _LETTER.search(word) else None
+
+
+def unique_words(chunks, max_words=config.UPLOAD_MAX_WORDS):
+    """
+    按出现顺序去重
+    :param chunks: 文本片段（行、单元格或整块文本）的可迭代对象
+    :return: (words, truncated)，truncated 表示因超过 max_words 提前停止
+    """
+    seen = {}
+    for chunk in chunks:
+        if chunk is None:
+            continue
+        # 片段内先用 dict.fromkeys 去重（C 层完成），每个不同的切分结果只清理一次，再并入总表
+        for token in dict.fromkeys(_TOKEN.findall(str(chunk).lower())):
+            w = _clean(token)
+            if w is not None and w not in seen:
+                if max_words is not None and len(seen) >= max_words:
+                    return list(seen), True
+                seen[w] = None
+    return list(seen), False
+
+
+def _rows(rows):
+    # 第一行是表头且含 Word 列时只取该列，否则取所有单元格
+    col = None
+    for i, row in enumerate(rows):
+        if i == 0:
+            heads = [str(c).strip().lower() if c is not None else "" for c in row]
+            col = next((j for j, h in enumerate(heads) if h in _WORD_COLUMNS), None)
+            if col is not None:
+                continue
+        if col is None:
+            yield from row
+        elif col < len(row):
+            yield row[col]
+
+
+def _text_lines(f):
+    text = io.TextIOWrapper(f, encoding="utf-8-sig", errors="replace", newline="")
+    try:
+        yield from text
+    finally:
+        if not text.closed:
+            text.detach()  # 不关闭调用方的文件（Streamlit 重跑时还会再读同一个上传文件）
+
+
+def _text_blocks(f):
+    # 按块读取，块尾不完整的单词留到下一块
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    tail = ""
+    while True:
+        data = f.read(BLOCK_SIZE)
+        text = tail + decoder.decode(data, final=not data)
+        if not data:
+            yield text
+            return
+        # 在最后一个分隔符处切开（逗号、制表符分隔的文件也一样）；从尾部反向匹配，不扫描整块
+        cut = len(text) - _PARTIAL.match(text[::-1]).end()
+        if cut <= 0:
+            tail = text
+            continue
+        tail = text[cut:]
+        yield text[:cut]
+
+
+def read_cells(f, name):
+    """
+    按扩展名把上传的文件转成单元格流
+    :param f: 二进制文件对象（Streamlit 的 UploadedFile 或 open(..., 'rb')）
+    """
+    ext = os.path.splitext(name)[1].lower().lstrip(".")
+    if ext == "xlsx":
+        from openpyxl import load_workbook  # 只有上传 xlsx 时才需要
+        wb = load_workbook(f, read_only=True, data_only=True)
+        try:
+            yield from _rows(wb.active.iter_rows(values_only=True))
+        finally:
+            wb.close()
+    elif ext == "csv":
+        yield from _rows(csv.reader(_text_lines(f)))
+    elif ext == "txt":
+        yield from _text_blocks(f)
+    else:
+        raise ValueError(f"不支持的文件类型: {name}（可用: {' / '.join(TYPES)}）")
+
+
+def words_from_file(f, name, max_words=config.UPLOAD_MAX_WORDS):
+    """:return: (words, truncated)"""
+    return unique_words(read_cells(f, name), max_words)
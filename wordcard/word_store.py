@@ -0,0 +1,233 @@
+# ================= 词库主存储（SQLite）=================
+# Total_Words.xlsx 只作为导入/导出的同步对象：
+#   - 存储文件不存在时，从 xlsx 原样迁移（行顺序、列、空值全部保留）
+#   - xlsx 比上次同步更新时（老师手动改了表格），自动导入
+#   - 需要 xlsx 时通过 export_to_excel / 命令行导出
+# 日常读取与追加只走 sqlite3，不再经过 openpyxl。
+# 命令行：python -m wordcard.word_store migrate|export [xlsx] [store]
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+
+from . import config
+
+DEFAULT_COLUMNS = ["Word", "Phonetic", "Meaning", "Example", "Collocation"]
+
+
+def _connect(store_path):
+    conn = sqlite3.connect(store_path, timeout=30)
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    return conn
+
+
+def _get_meta(conn, key, default=None):
+    row = conn.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+    return row[0] if row else default
+
+
+def _set_meta(conn, key, value):
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+
+def _columns(conn):
+    cols = _get_meta(conn, "columns")
+    return cols.split("\x1f") if cols else []
+
+
+def _fetch_rows(conn, with_low=False, with_id=False):
+    columns = _columns(conn)
+    if not columns:
+        return columns, []
+    col_sql = ", ".join(f"c{i}" for i in range(len(columns)))
+    if with_low:
+        col_sql = "low, " + col_sql
+    if with_id:
+        col_sql = "id, " + col_sql
+    return columns, conn.execute(f"SELECT {col_sql} FROM words ORDER BY id").fetchall()
+
+
+def _mark_synced(store_path, xlsx_path, synced_id):
+    """
+    :param synced_id: 已与 xlsx 同步的最大行 id；之后追加的行（id 更大）才算「xlsx 里还没有」
+    """
+    conn = _connect(store_path)
+    try:
+        with conn:
+            _set_meta(conn, "xlsx_mtime_ns", _xlsx_mtime(xlsx_path))
+            _set_meta(conn, "synced_id", synced_id)
+    finally:
+        conn.close()
+
+
+def _cell(value):
+    # 空单元格存为 NULL；str/int/float 原样保留（列不声明类型，SQLite 不做转换）
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, (str, int, float)):
+        return value
+    return str(value)
+
+
+def _low(value):
+    return str(value).lower() if value is not None else ""
+
+
+def write_frame(store_path, df):
+    """
+    用 df 整体替换存储内容（迁移/导入用）
+    :return: 写入后的最大行 id
+    """
+    columns = [str(c) for c in df.columns]
+    col_sql = ", ".join(f"c{i}" for i in range(len(columns)))
+    rows = []
+    word_idx = columns.index("Word") if "Word" in columns else None
+    for rec in df.itertuples(index=False, name=None):
+        cells = [_cell(v) for v in rec]
+        low = _low(cells[word_idx]) if word_idx is not None else ""
+        rows.append([low] + cells)
+    conn = _connect(store_path)
+    try:
+        with conn:
+            conn.execute("DROP TABLE IF EXISTS words")
+            conn.execute(f"CREATE TABLE words (id INTEGER PRIMARY KEY AUTOINCREMENT, low TEXT, {col_sql})")
+            conn.execute("CREATE INDEX words_low ON words (low)")
+            if rows:
+                marks = ", ".join("?" * (len(columns) + 1))
+                conn.executemany(f"INSERT INTO words (low, {col_sql}) VALUES ({marks})", rows)
+            _set_meta(conn, "columns", "\x1f".join(columns))
+            return conn.execute("SELECT COALESCE(MAX(id), 0) FROM words").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def read_frame(store_path):
+    """读取全部词条，结果与原先 pd.read_excel(...).astype(str) 一致"""
+    conn = _connect(store_path)
+    try:
+        columns, rows = _fetch_rows(conn)
+    finally:
+        conn.close()
+    if not columns:
+        return pd.DataFrame(columns=DEFAULT_COLUMNS)
+    return pd.DataFrame.from_records(rows, columns=columns).astype(str)
+
+
+def append_words(store_path, records):
+    """
+    追加新词条；与已有词条（不区分大小写）重复时以新词条为准，
+    等价于原先 concat + drop_duplicates(keep='last') 的结果。
+    """
+    if not records: return
+    conn = _connect(store_path)
+    try:
+        with conn:
+            columns = _columns(conn)
+            if not columns:
+                columns = list(DEFAULT_COLUMNS)
+                _set_meta(conn, "columns", "\x1f".join(columns))
+            # 同一批次内重复的单词只保留最后一条
+            latest = {}
+            for rec in records:
+                low = _low(rec.get("Word", ""))
+                latest.pop(low, None)
+                latest[low] = rec
+            col_sql = ", ".join(f"c{i}" for i in range(len(columns)))
+            marks = ", ".join("?" * (len(columns) + 1))
+            conn.executemany("DELETE FROM words WHERE low=?", [(low,) for low in latest])
+            conn.executemany(
+                f"INSERT INTO words (low, {col_sql}) VALUES ({marks})",
+                [[low] + [_cell(rec.get(c, "")) for c in columns] for low, rec in latest.items()],
+            )
+    finally:
+        conn.close()
+
+
+def _xlsx_mtime(xlsx_path):
+    return os.stat(xlsx_path).st_mtime_ns if os.path.exists(xlsx_path) else 0
+
+
+def migrate_from_excel(xlsx_path, store_path):
+    """把现有工作簿原样转换为存储文件（不做 astype，保留空值与原始类型）"""
+    df = pd.read_excel(xlsx_path)
+    _mark_synced(store_path, xlsx_path, write_frame(store_path, df))
+    return len(df)
+
+
+def import_from_excel(xlsx_path, store_path):
+    """
+    xlsx 被手动修改后导入：以 xlsx 的行为准，
+    上次同步之后才追加、xlsx 里不可能有的词条（如 AI 新增、尚未导出的）保留在末尾；
+    已同步过的词条在 xlsx 中被删掉时随之删除。
+    """
+    if not os.path.exists(store_path):
+        return migrate_from_excel(xlsx_path, store_path)
+    sheet = pd.read_excel(xlsx_path)
+    conn = _connect(store_path)
+    try:
+        synced_id = int(_get_meta(conn, "synced_id", 0))
+        columns, stored = _fetch_rows(conn, with_low=True, with_id=True)
+    finally:
+        conn.close()
+    in_sheet = set(sheet["Word"].map(_low)) if "Word" in sheet.columns else set()
+    extra = pd.DataFrame.from_records(
+        [r[2:] for r in stored if r[0] > synced_id and r[1] not in in_sheet], columns=columns)
+    combined = pd.concat([sheet, extra], ignore_index=True) if len(extra) else sheet
+    _mark_synced(store_path, xlsx_path, write_frame(store_path, combined))
+    return len(combined)
+
+
+def export_to_excel(store_path, xlsx_path):
+    """按需导出为 xlsx（唯一仍需要 openpyxl 的写入路径）"""
+    conn = _connect(store_path)
+    try:
+        columns, rows = _fetch_rows(conn, with_id=True)
+    finally:
+        conn.close()
+    # 同一次查询里取 id，导出期间新追加的行不会被误记为已同步
+    synced_id = max((r[0] for r in rows), default=0)
+    df = pd.DataFrame.from_records([r[1:] for r in rows], columns=columns or DEFAULT_COLUMNS)
+    # 先写临时文件再替换，导出中途出错或有人正在读时不会留下半个工作簿
+    tmp_path = xlsx_path + ".tmp.xlsx"
+    try:
+        df.to_excel(tmp_path, index=False)
+        os.replace(tmp_path, xlsx_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    _mark_synced(store_path, xlsx_path, synced_id)
+    return len(df)
+
+
+def needs_import(xlsx_path, store_path):
+    if not os.path.exists(xlsx_path):
+        return False
+    if not os.path.exists(store_path):
+        return True
+    conn = _connect(store_path)
+    try:
+        synced = int(_get_meta(conn, "xlsx_mtime_ns", 0))
+    finally:
+        conn.close()
+    return _xlsx_mtime(xlsx_path) > synced
+
+
+def sync_from_excel(xlsx_path, store_path):
+    """xlsx 比存储新时导入，返回是否发生了导入"""
+    if needs_import(xlsx_path, store_path):
+        import_from_excel(xlsx_path, store_path)
+        return True
+    return False
+
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "migrate"
+    xlsx = sys.argv[2] if len(sys.argv) > 2 else config.DATA_FILE
+    store = sys.argv[3] if len(sys.argv) > 3 else config.STORE_FILE
+    if cmd == "migrate":
+        print(f"已迁移 {migrate_from_excel(xlsx, store)} 行 -> {store}")
+    elif cmd == "export":
+        print(f"已导出 {export_to_excel(store, xlsx)} 行 -> {xlsx}")
+    else:
+        sys.exit(f"未知命令: {cmd}（可用: migrate / export）")
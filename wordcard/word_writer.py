@@ -0,0 +1,175 @@
+# ================= 词库后台写入 =================
+# AI 新生成的词条不再在用户的请求里同步写库：
+#   - 各会话把词条交给同一个后台写线程（队列），submit 立即返回
+#   - 写线程攒一小段时间（防抖）再合并成一次写入，同一单词只写最后一条
+#   - 一次写入是一个 SQLite 事务，要么整批可见要么都不可见，多个会话不会互相覆盖
+#   - 还没写入的词条通过 pending() 提供给内存词库，查词不必等写入完成
+# 进程退出时（atexit）把剩余的词条写完。
+import atexit
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+from . import config, metrics, word_store
+
+_FLUSH = object()
+_STOP = object()
+
+
+class WordWriter:
+    def __init__(self, store_path, debounce=config.WRITE_DEBOUNCE_SECONDS,
+                 max_delay=config.WRITE_MAX_DELAY_SECONDS, on_flush=None):
+        """
+        :param debounce: 最后一次提交后安静多久才写入（秒）
+        :param max_delay: 持续有提交时，第一条词条最多等待多久（秒）
+        :param on_flush: 每次写入完成后在写线程里调用，参数为本次写入的词条列表
+        """
+        self.store_path = store_path
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.on_flush = on_flush
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()  # 小写单词 -> 已提交未写入的词条
+        self._thread = None
+        self.flushes = 0
+        self.written = 0
+        self.last_error = None
+
+    def submit(self, records):
+        """交给后台写入，立即返回"""
+        records = [r for r in records if r.get("Word")]
+        if not records: return
+        with self._lock:
+            for rec in records:
+                low = str(rec["Word"]).lower()
+                self._pending.pop(low, None)
+                self._pending[low] = rec
+            self._ensure_thread()
+        self._queue.put(records)
+
+    def pending(self):
+        """已提交、尚未写入存储的词条（同一单词只保留最后一条）"""
+        with self._lock:
+            return list(self._pending.values())
+
+    def flush(self, timeout=None):
+        """立即写入已提交的全部词条并等待完成（导出 xlsx、退出前调用）"""
+        with self._lock:
+            if self._thread is None:
+                return True
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        if not done.wait(timeout):
+            return False
+        with self._lock:
+            return not self._pending
+
+    def close(self, timeout=30):
+        with self._lock:
+            thread = self._thread
+        if thread is None: return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            return {"pending": len(self._pending), "flushes": self.flushes, "written": self.written,
+                    "last_error": self.last_error}
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="wordcard-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            batch, waiters, stop = OrderedDict(), [], False
+            first = time.monotonic()
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, tuple) and item[0] is _FLUSH:
+                    waiters.append(item[1])
+                else:
+                    for rec in item:
+                        low = str(rec["Word"]).lower()
+                        batch.pop(low, None)
+                        batch[low] = rec
+                if stop or waiters:
+                    # 收到 flush/stop 时把队列里剩下的一并带上，立即写入
+                    try:
+                        item = self._queue.get_nowait()
+                        continue
+                    except queue.Empty:
+                        break
+                wait = min(self.debounce, self.max_delay - (time.monotonic() - first))
+                if wait <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=wait)
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            for done in waiters:
+                done.set()
+            if stop:
+                return
+
+    def _write(self, batch):
+        records = list(batch.values())
+        try:
+            with metrics.span("save_words"):
+                word_store.append_words(self.store_path, records)
+        except Exception as e:
+            # 写入失败（如库被锁住太久）时词条留在 pending 里，内存中仍可查到，稍后重试
+            with self._lock:
+                self.last_error = repr(e)
+            metrics.incr("word_write_errors")
+            self._queue.put(records)
+            time.sleep(self.debounce)
+            return
+        with self._lock:
+            for low, rec in batch.items():
+                # 写入期间又提交了同一单词的新版本时保留新版本
+                if self._pending.get(low) is rec:
+                    del self._pending[low]
+            self.flushes += 1
+            self.written += len(records)
+            self.last_error = None
+        metrics.incr("words_written", len(records))
+        if self.on_flush is not None:
+            try:
+                self.on_flush(records)
+            except Exception as e:
+                with self._lock:
+                    self.last_error = repr(e)
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(store_path, on_flush=None):
+    """同一存储文件在进程内只有一个写线程"""
+    with _writers_lock:
+        writer = _writers.get(store_path)
+        if writer is None:
+            writer = _writers[store_path] = WordWriter(store_path, on_flush=on_flush)
+            atexit.register(writer.close)
+        return writer
+
+
+def pending(store_path):
+    with _writers_lock:
+        writer = _writers.get(store_path)
+    return writer.pending() if writer is not None else []
+
+
+def stats():
+    with _writers_lock:
+        writers = list(_writers.items())
+    return {path: w.stats() for path, w in writers}